@@ -64,7 +64,7 @@ new_graph = Graph()
 # Add nodes
 for node_id in largest:
     node = graph.get_node(node_id)
-    new_node = Node(node.id, node.latitude, node.longitude, node.tags.copy())
+    new_node = Node(node.id, node.latitude, node.longitude, node.tags)
     new_graph.add_node(new_node)
 
 # Add edges
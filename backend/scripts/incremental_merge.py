@@ -44,7 +44,7 @@ def add_graph_to_existing(base_graph: Graph, new_graph: Graph) -> tuple:
                 id=node.id,
                 latitude=node.latitude,
                 longitude=node.longitude,
-                tags=node.tags.copy()
+                tags=node.tags
             )
             base_graph.add_node(new_node)
             nodes_added += 1
@@ -53,7 +53,7 @@ def add_graph_to_existing(base_graph: Graph, new_graph: Graph) -> tuple:
     
     # Add edges
     for edge_key, edge in new_graph.edges.items():
-        if edge_key not in base_graph.edges:
+        if base_graph.get_edge(*edge_key) is None:
             # Both nodes must exist
             if edge.from_node_id in base_graph.nodes and edge.to_node_id in base_graph.nodes:
                 new_edge = Edge(
@@ -62,7 +62,7 @@ def add_graph_to_existing(base_graph: Graph, new_graph: Graph) -> tuple:
                     weight=edge.weight,
                     road_type=edge.road_type,
                     max_speed=edge.max_speed,
-                    tags=edge.tags.copy(),
+                    tags=edge.tags,
                     bidirectional=edge.bidirectional,
                     name=edge.name
                 )
@@ -73,10 +73,10 @@ def add_graph_to_existing(base_graph: Graph, new_graph: Graph) -> tuple:
                 from_node = base_graph.nodes[edge.from_node_id]
                 to_node = base_graph.nodes[edge.to_node_id]
                 
-                # Check if neighbor already exists
-                neighbor_exists = any(n.id == to_node.id for n, _ in from_node.neighbors)
-                if not neighbor_exists:
-                    from_node.neighbors.append((to_node, edge.weight))
+                # add_neighbor ignores neighbors that already exist
+                from_node.add_neighbor(to_node, edge.weight)
+                if edge.bidirectional:
+                    to_node.add_neighbor(from_node, edge.weight)
                 
                 edges_added += 1
         else:
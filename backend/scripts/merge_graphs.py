@@ -65,7 +65,7 @@ def merge_graphs(graph_files: list, output_name: str = "hanoi_merged") -> Graph:
                     id=node.id,
                     latitude=node.latitude,
                     longitude=node.longitude,
-                    tags=node.tags.copy()
+                    tags=node.tags
                 )
                 merged_graph.add_node(new_node)
                 nodes_added += 1
@@ -78,7 +78,7 @@ def merge_graphs(graph_files: list, output_name: str = "hanoi_merged") -> Graph:
         # Merge edges
         edges_added = 0
         for edge_key, edge in source_graph.edges.items():
-            if edge_key not in merged_graph.edges:
+            if merged_graph.get_edge(*edge_key) is None:
                 # Both nodes must exist in merged graph
                 if edge.from_node_id in merged_graph.nodes and edge.to_node_id in merged_graph.nodes:
                     new_edge = Edge(
@@ -87,7 +87,7 @@ def merge_graphs(graph_files: list, output_name: str = "hanoi_merged") -> Graph:
                         weight=edge.weight,
                         road_type=edge.road_type,
                         max_speed=edge.max_speed,
-                        tags=edge.tags.copy(),
+                        tags=edge.tags,
                         bidirectional=edge.bidirectional,
                         name=edge.name
                     )
@@ -99,10 +99,10 @@ def merge_graphs(graph_files: list, output_name: str = "hanoi_merged") -> Graph:
                     from_node = merged_graph.nodes[edge.from_node_id]
                     to_node = merged_graph.nodes[edge.to_node_id]
                     
-                    # Check if neighbor already exists
-                    neighbor_exists = any(n.id == to_node.id for n, _ in from_node.neighbors)
-                    if not neighbor_exists:
-                        from_node.add_neighbor(to_node, edge.weight)
+                    # add_neighbor ignores neighbors that already exist
+                    from_node.add_neighbor(to_node, edge.weight)
+                    if edge.bidirectional:
+                        to_node.add_neighbor(from_node, edge.weight)
                     
                     edges_added += 1
             else:
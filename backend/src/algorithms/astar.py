@@ -5,11 +5,15 @@ Optimized for geographic road networks
 
 import heapq
 import logging
+import math
 from typing import List, Dict, Optional, Tuple, Callable
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from ..core.graph import Graph
 from ..core.node import Node
+from ..utils.jit import njit
 from .heuristics import haversine_distance
 
 logger = logging.getLogger(__name__)
@@ -22,6 +26,70 @@ class PriorityNode:
     node_id: int = field(compare=False)
 
 
+@njit('Tuple((int32[::1], float64, int64))(int32[::1], int32[::1], float32[::1], '
+      'float64[::1], float64[::1], float64[::1], int64, int64)', cache=True)
+def _astar_csr(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+               lat_rad: np.ndarray, lon_rad: np.ndarray, cos_lat: np.ndarray,
+               start: int, goal: int) -> Tuple[np.ndarray, float, int]:
+    """
+    A* over CSR adjacency arrays with an inline Haversine heuristic
+    
+    Args:
+        indptr, indices, weights: CSR adjacency of the graph
+        lat_rad, lon_rad, cos_lat: Per-node coordinates in radians and cos(latitude)
+        start: Start node index
+        goal: Goal node index
+        
+    Returns:
+        (came_from, goal_cost, nodes_explored); goal_cost is inf if unreachable
+    """
+    node_count = indptr.shape[0] - 1
+    g_score = np.full(node_count, np.inf)
+    came_from = np.full(node_count, -1, dtype=np.int32)
+    closed = np.zeros(node_count, dtype=np.bool_)
+    
+    goal_lat = lat_rad[goal]
+    goal_lon = lon_rad[goal]
+    goal_cos = cos_lat[goal]
+    
+    g_score[start] = 0.0
+    open_set = [(0.0, np.int64(start))]
+    explored = 0
+    
+    while open_set:
+        _, current = heapq.heappop(open_set)
+        
+        if closed[current]:
+            continue
+        
+        if current == goal:
+            return came_from, g_score[goal], explored
+        
+        closed[current] = True
+        explored += 1
+        current_g = g_score[current]
+        
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = np.int64(indices[k])
+            if closed[neighbor]:
+                continue
+            
+            tentative_g = current_g + weights[k]
+            if tentative_g < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g
+                
+                # Haversine distance to goal (meters)
+                sin_dlat = math.sin((goal_lat - lat_rad[neighbor]) * 0.5)
+                sin_dlon = math.sin((goal_lon - lon_rad[neighbor]) * 0.5)
+                a = sin_dlat * sin_dlat + cos_lat[neighbor] * goal_cos * sin_dlon * sin_dlon
+                h = 2.0 * 6371000.0 * math.asin(math.sqrt(a))
+                
+                heapq.heappush(open_set, (tentative_g + h, neighbor))
+    
+    return came_from, np.inf, explored
+
+
 class AStar:
     """
     A* pathfinding algorithm implementation
@@ -78,6 +146,10 @@ class AStar:
         if start_id == goal_id:
             return [start_id]
         
+        # Default heuristic runs on the CSR arrays; custom heuristics walk node objects
+        if self.heuristic_func is haversine_distance:
+            return self._find_path_csr(start_id, goal_id, start_time)
+        
         # Initialize data structures
         open_set = []  # Priority queue
         heapq.heappush(open_set, PriorityNode(0, start_id))
@@ -139,6 +211,44 @@ class AStar:
         logger.info(f"Explored {self.stats['nodes_explored']} nodes in {self.stats['search_time']:.2f}s")
         return None
     
+    def _find_path_csr(self, start_id: int, goal_id: int,
+                       start_time: float) -> Optional[List[int]]:
+        """Run A* on integer node indices, translating IDs only at the boundary"""
+        import time
+        
+        graph = self.graph
+        graph.ensure_csr()
+        
+        start = graph.id_to_idx[start_id]
+        goal = graph.id_to_idx[goal_id]
+        
+        came_from, goal_cost, explored = _astar_csr(
+            graph.indptr, graph.indices, graph.weights,
+            graph.node_lat_rad, graph.node_lon_rad, graph.node_cos_lat,
+            start, goal
+        )
+        
+        self.stats['nodes_explored'] = int(explored)
+        self.stats['search_time'] = time.time() - start_time
+        
+        if math.isinf(goal_cost):
+            logger.warning(f"No path found from {start_id} to {goal_id}")
+            logger.info(f"Explored {self.stats['nodes_explored']} nodes in {self.stats['search_time']:.2f}s")
+            return None
+        
+        idx_path = [goal]
+        while idx_path[-1] != start:
+            idx_path.append(int(came_from[idx_path[-1]]))
+        idx_path.reverse()
+        path = graph.idx_to_id[idx_path].tolist()
+        
+        self.stats['nodes_in_path'] = len(path)
+        self.stats['total_distance'] = float(goal_cost)
+        logger.info(f"Path found: {len(path)} nodes, "
+                  f"{goal_cost:.0f}m, "
+                  f"{self.stats['nodes_explored']} nodes explored")
+        return path
+    
     def find_path_with_details(self, start_id: int, goal_id: int) -> Optional[Dict]:
         """
         Find path and return detailed information
@@ -3,7 +3,12 @@ Pathfinding service with absolute paths
 """
 
 import logging
-from typing import Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import orjson
+
 from ..core.graph import Graph
 from ..algorithms.astar import AStar
 from ..cache.destination_cache import DestinationCache
@@ -13,9 +18,26 @@ from ..utils.path_utils import get_graph_file, get_cache_db_file
 logger = logging.getLogger(__name__)
 
 
+def _replayed_response(response: Dict, start_snap_dist: float, end_snap_dist: float) -> Dict:
+    """Copy of a cached route response for a new request (the original is shared)"""
+    route = response['route']
+    return {
+        **response,
+        'route': {
+            **route,
+            'start': {**route['start'], 'snap_distance': start_snap_dist},
+            'end': {**route['end'], 'snap_distance': end_snap_dist},
+            'cached': True
+        }
+    }
+
+
 class PathfindingService:
     """Main pathfinding service with absolute paths"""
     
+    # Byte budget for cached responses, by serialized size (~10k routes at ~5 KB each)
+    RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+    
     def __init__(self, graph_name: str = "hanoi_manual_graph_v1"):
         """Initialize pathfinding service"""
         self.graph_name = graph_name
@@ -24,6 +46,11 @@ class PathfindingService:
         self.optimizer = None
         self.pathfinder = None
         
+        # In-process LRU of (response dict, serialized size) per node pair
+        self._response_cache: OrderedDict = OrderedDict()
+        self._response_cache_bytes = 0
+        self._response_lock = threading.Lock()
+        
         self._load_graph()
         self._init_cache()
         
@@ -41,8 +68,10 @@ class PathfindingService:
         self.graph = Graph()
         self.graph.load_from_file(str(graph_file))
         self.pathfinder = AStar(self.graph)
+        self.clear_response_cache()
         
-        logger.info(f"Loaded: {len(self.graph.nodes)} nodes, {len(self.graph.edges)} edges")
+        logger.info(f"Loaded: {len(self.graph.nodes)} nodes, {len(self.graph.edges)} edges "
+                   f"({self.graph.arc_count} directed arcs)")
     
     def _init_cache(self):
         """Initialize cache system"""
@@ -69,6 +98,65 @@ class PathfindingService:
         Returns:
             Dictionary with route details or None
         """
+        snapped = self._snap_endpoints(start_lat, start_lon, end_lat, end_lon)
+        if snapped is None:
+            return None
+        
+        start_node, end_node, start_snap_distance, end_snap_distance = snapped
+        return self._route_response(start_node.id, end_node.id, use_cache,
+                                    start_snap_distance, end_snap_distance)
+    
+    def find_route_by_node_ids(self, start_id: int, end_id: int,
+                               use_cache: bool = True) -> Optional[Dict]:
+        """
+        Find route between two node IDs
+        
+        Args:
+            start_id: Starting node ID
+            end_id: Ending node ID
+            use_cache: Whether to use cached routes
+            
+        Returns:
+            Dictionary with route details or None
+        """
+        return self._route_response(start_id, end_id, use_cache, 0, 0)
+    
+    def find_route_json_by_coordinates(self, start_lat: float, start_lon: float,
+                                       end_lat: float, end_lon: float,
+                                       use_cache: bool = True) -> Optional[bytes]:
+        """
+        Same as find_route_by_coordinates, returning the serialized JSON response
+        
+        Requests whose points snap to the same node pair are served from the
+        in-process response cache.
+        """
+        snapped = self._snap_endpoints(start_lat, start_lon, end_lat, end_lon)
+        if snapped is None:
+            return None
+        
+        start_node, end_node, start_snap_distance, end_snap_distance = snapped
+        return self._cached_response(start_node.id, end_node.id, use_cache,
+                                     start_snap_distance, end_snap_distance)
+    
+    def find_route_json_by_node_ids(self, start_id: int, end_id: int,
+                                    use_cache: bool = True) -> Optional[bytes]:
+        """
+        Same as find_route_by_node_ids, returning the serialized JSON response
+        
+        Repeated requests for the same node pair are served from the
+        in-process response cache.
+        """
+        return self._cached_response(start_id, end_id, use_cache, 0, 0)
+    
+    def _snap_endpoints(self, start_lat: float, start_lon: float,
+                        end_lat: float, end_lon: float) -> Optional[Tuple]:
+        """
+        Snap both points to their nearest road nodes
+        
+        Returns:
+            (start_node, end_node, start_snap_distance, end_snap_distance),
+            or None if either point has no road nearby
+        """
         # Find nearest nodes
         start_node = self.graph.find_nearest_node(start_lat, start_lon, max_distance=1000)
         end_node = self.graph.find_nearest_node(end_lat, end_lon, max_distance=1000)
@@ -87,66 +175,103 @@ class PathfindingService:
                                                 start_node.latitude, start_node.longitude)
         end_snap_distance = haversine_distance(end_lat, end_lon,
                                               end_node.latitude, end_node.longitude)
-        
-        # Find route
-        route = self.optimizer.find_route(start_node.id, end_node.id, use_cache=use_cache)
+        return start_node, end_node, start_snap_distance, end_snap_distance
+    
+    def _route_response(self, start_id: int, end_id: int, use_cache: bool,
+                        start_snap_dist: float, end_snap_dist: float) -> Optional[Dict]:
+        """Find the route between two nodes and build its response"""
+        route = self.optimizer.find_route(start_id, end_id, use_cache=use_cache)
         
         if not route:
             return None
         
-        # Build detailed response
+        start_node = self.graph.get_node(start_id)
+        end_node = self.graph.get_node(end_id)
+        
         return self._build_route_response(route, start_node, end_node,
-                                         start_snap_distance, end_snap_distance)
+                                          start_snap_dist, end_snap_dist)
     
-    def find_route_by_node_ids(self, start_id: int, end_id: int,
-                               use_cache: bool = True) -> Optional[Dict]:
+    def clear_cache(self) -> bool:
+        """Clear the persistent route cache and the serialized responses built from it"""
+        cleared = self.cache.clear_cache()
+        self.clear_response_cache()
+        return cleared
+    
+    def clear_response_cache(self) -> None:
+        """Drop all serialized responses (call after clearing caches or reloading the graph)"""
+        with self._response_lock:
+            self._response_cache.clear()
+            self._response_cache_bytes = 0
+    
+    def _cached_response(self, start_id: int, end_id: int, use_cache: bool,
+                         start_snap_dist: float, end_snap_dist: float) -> Optional[bytes]:
         """
-        Find route between two node IDs
+        Serve a route response from the LRU, building and storing it on a miss
         
-        Args:
-            start_id: Starting node ID
-            end_id: Ending node ID
-            use_cache: Whether to use cached routes
-            
-        Returns:
-            Dictionary with route details or None
+        Entries are response dicts keyed on the node pair; a hit only swaps
+        in this request's snap distances and the cached flag. Either way the
+        response is serialized once.
         """
-        route = self.optimizer.find_route(start_id, end_id, use_cache=use_cache)
+        key = (start_id, end_id)
+        if use_cache:
+            with self._response_lock:
+                entry = self._response_cache.get(key)
+                if entry is not None:
+                    self._response_cache.move_to_end(key)
+            if entry is not None:
+                return orjson.dumps(_replayed_response(entry[0], start_snap_dist, end_snap_dist))
         
-        if not route:
+        response = self._route_response(start_id, end_id, use_cache,
+                                        start_snap_dist, end_snap_dist)
+        if response is None:
             return None
         
-        start_node = self.graph.get_node(start_id)
-        end_node = self.graph.get_node(end_id)
+        payload = orjson.dumps(response)
+        if use_cache:
+            self._store_response(key, response, len(payload))
+        return payload
+    
+    def _store_response(self, key: Hashable, response: Dict, size: int) -> None:
+        """Insert a response, evicting least recently used entries over budget"""
+        if size > self.RESPONSE_CACHE_MAX_BYTES:
+            return
         
-        return self._build_route_response(route, start_node, end_node, 0, 0)
+        with self._response_lock:
+            previous = self._response_cache.pop(key, None)
+            if previous is not None:
+                self._response_cache_bytes -= previous[1]
+            
+            self._response_cache[key] = (response, size)
+            self._response_cache_bytes += size
+            
+            while self._response_cache_bytes > self.RESPONSE_CACHE_MAX_BYTES:
+                _, (_, evicted_size) = self._response_cache.popitem(last=False)
+                self._response_cache_bytes -= evicted_size
     
     def _build_route_response(self, route: Dict, start_node, end_node,
                              start_snap_dist: float, end_snap_dist: float) -> Dict:
         """Build formatted route response"""
         
         # Extract path coordinates
-        path_coords = []
-        for node_id in route['path']:
-            node = self.graph.get_node(node_id)
-            if node:
-                path_coords.append({
-                    'lat': node.latitude,
-                    'lon': node.longitude
-                })
+        nodes = self.graph.nodes
+        path_coords = [
+            {'lat': node.latitude, 'lon': node.longitude}
+            for node in map(nodes.get, route['path'])
+            if node
+        ]
         
         # Build segments with turn-by-turn directions
-        segments = []
-        if 'segments' in route:
-            for seg in route['segments']:
-                segments.append({
-                    'from': seg['from'],
-                    'to': seg['to'],
-                    'distance': seg['distance'],
-                    'time': seg['time'],
-                    'road_name': seg.get('road_name', 'Unnamed road'),
-                    'road_type': seg.get('road_type', 'unknown')
-                })
+        segments = [
+            {
+                'from': seg['from'],
+                'to': seg['to'],
+                'distance': seg['distance'],
+                'time': seg['time'],
+                'road_name': seg.get('road_name', 'Unnamed road'),
+                'road_type': seg.get('road_type', 'unknown')
+            }
+            for seg in route.get('segments', ())
+        ]
         
         return {
             'success': True,
@@ -216,6 +341,7 @@ class PathfindingService:
             'graph': {
                 'nodes': len(self.graph.nodes),
                 'edges': len(self.graph.edges),
+                'arcs': self.graph.arc_count,
                 'name': self.graph_name
             },
             'cache': cache_stats,
@@ -2,17 +2,66 @@
 Flask REST API endpoints for pathfinding service
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import fastjsonschema
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .pathfinding_service import PathfindingService
 
 logger = logging.getLogger(__name__)
 
+# Process-wide service instance. Under `gunicorn --preload` the master builds it
+# once and forked workers share the loaded graph copy-on-write.
+_service: Optional[PathfindingService] = None
+
+
+_POINT_SCHEMA = {
+    'type': 'object',
+    'required': ['lat', 'lon'],
+    'properties': {
+        'lat': {'type': 'number', 'minimum': -90, 'maximum': 90},
+        'lon': {'type': 'number', 'minimum': -180, 'maximum': 180}
+    }
+}
+
+# Request body for POST /api/route/coordinates
+COORDINATES_REQUEST_SCHEMA = {
+    'type': 'object',
+    'required': ['start', 'end'],
+    'properties': {
+        'start': _POINT_SCHEMA,
+        'end': _POINT_SCHEMA,
+        'use_cache': {'type': 'boolean'}
+    }
+}
+
+# Request body for POST /api/route/nodes
+NODES_REQUEST_SCHEMA = {
+    'type': 'object',
+    'required': ['start_id', 'end_id'],
+    'properties': {
+        'start_id': {'type': 'integer'},
+        'end_id': {'type': 'integer'},
+        'use_cache': {'type': 'boolean'}
+    }
+}
+
+
+def get_service() -> PathfindingService:
+    """Get the process-wide pathfinding service, building it on first use"""
+    global _service
+    if _service is None:
+        _service = PathfindingService()
+    return _service
+
 
 def create_app():
     """Create and configure Flask application"""
+    # Compile request validators once; each call is then a generated function
+    validate_coordinates = fastjsonschema.compile(COORDINATES_REQUEST_SCHEMA)
+    validate_nodes = fastjsonschema.compile(NODES_REQUEST_SCHEMA)
+    
     app = Flask(__name__)
     
     # Enable CORS for frontend
@@ -26,7 +75,7 @@ def create_app():
     
     # Initialize pathfinding service
     try:
-        pathfinding_service = PathfindingService()
+        pathfinding_service = get_service()
         logger.info("Pathfinding service initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize pathfinding service: {e}")
@@ -77,7 +126,8 @@ def create_app():
                 'route_coordinates': 'POST /api/route/coordinates',
                 'route_nodes': 'POST /api/route/nodes',
                 'nearest_node': 'GET /api/node/nearest',
-                'statistics': 'GET /api/statistics'
+                'statistics': 'GET /api/statistics',
+                'clear_cache': 'POST /api/cache/clear'
             }
         })
     
@@ -97,48 +147,32 @@ def create_app():
         if error:
             return error
         
-        data = request.get_json()
+        # A missing or malformed body becomes None and fails validation
+        data = request.get_json(silent=True)
         
         # Validate input
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No data provided'
-            }), 400
-        
-        if 'start' not in data or 'end' not in data:
+        try:
+            validate_coordinates(data)
+        except fastjsonschema.JsonSchemaException as e:
             return jsonify({
                 'success': False,
-                'error': 'Missing start or end coordinates'
+                'error': str(e)
             }), 400
         
         start = data['start']
         end = data['end']
-        
-        if 'lat' not in start or 'lon' not in start:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid start coordinates'
-            }), 400
-        
-        if 'lat' not in end or 'lon' not in end:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid end coordinates'
-            }), 400
-        
         use_cache = data.get('use_cache', True)
         
         # Find route
         try:
-            route = pathfinding_service.find_route_by_coordinates(
+            payload = pathfinding_service.find_route_json_by_coordinates(
                 start['lat'], start['lon'],
                 end['lat'], end['lon'],
                 use_cache=use_cache
             )
             
-            if route:
-                return jsonify(route)
+            if payload:
+                return Response(payload, mimetype='application/json')
             else:
                 return jsonify({
                     'success': False,
@@ -168,25 +202,28 @@ def create_app():
         if error:
             return error
         
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
-        if not data or 'start_id' not in data or 'end_id' not in data:
+        # Validate input
+        try:
+            validate_nodes(data)
+        except fastjsonschema.JsonSchemaException as e:
             return jsonify({
                 'success': False,
-                'error': 'Missing start_id or end_id'
+                'error': str(e)
             }), 400
         
         use_cache = data.get('use_cache', True)
         
         try:
-            route = pathfinding_service.find_route_by_node_ids(
+            payload = pathfinding_service.find_route_json_by_node_ids(
                 data['start_id'],
                 data['end_id'],
                 use_cache=use_cache
             )
             
-            if route:
-                return jsonify(route)
+            if payload:
+                return Response(payload, mimetype='application/json')
             else:
                 return jsonify({
                     'success': False,
@@ -266,6 +303,24 @@ def create_app():
                 'error': str(e)
             }), 500
     
+    @app.route('/api/cache/clear', methods=['POST'])
+    def clear_cache():
+        """Clear cached routes, including responses held in memory"""
+        error = check_service()
+        if error:
+            return error
+        
+        if not pathfinding_service.clear_cache():
+            return jsonify({
+                'success': False,
+                'error': 'Failed to clear cache'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'message': 'Cache cleared'
+        })
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -2,16 +2,89 @@
 Route caching system with absolute path handling
 """
 
+import os
 import sqlite3
 import pickle
 import logging
-from typing import List, Optional, Dict
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterable, List, Optional, Dict, Set, Tuple
 from datetime import datetime, timedelta
 
 from ..utils.path_utils import get_cache_db_file
 
 logger = logging.getLogger(__name__)
 
+# Hot-path statements. sqlite3 caches compiled statements per connection keyed
+# by SQL text, so each one is defined once and reused verbatim.
+_SQL_SELECT_ROUTE = '''
+    SELECT route_data, distance, travel_time, nodes_count, start_id 
+    FROM cached_routes 
+    WHERE start_id = ? AND end_id = ?
+'''
+
+# Either direction in one statement, preferring the forward one
+_SQL_SELECT_ROUTE_EITHER = '''
+    SELECT route_data, distance, travel_time, nodes_count, start_id 
+    FROM cached_routes 
+    WHERE (start_id = ? AND end_id = ?) OR (start_id = ? AND end_id = ?)
+    ORDER BY start_id = ? DESC
+    LIMIT 1
+'''
+
+_SQL_TOUCH_ROUTE = '''
+    UPDATE cached_routes 
+    SET last_accessed = CURRENT_TIMESTAMP,
+        access_count = access_count + 1
+    WHERE start_id = ? AND end_id = ?
+'''
+
+_SQL_COUNT_HIT = 'UPDATE cache_stats SET total_hits = total_hits + 1 WHERE id = 1'
+
+_SQL_COUNT_MISS = 'UPDATE cache_stats SET total_misses = total_misses + 1 WHERE id = 1'
+
+_SQL_UPDATE_ROUTE = '''
+    UPDATE cached_routes 
+    SET route_data = ?, distance = ?, travel_time = ?, nodes_count = ?,
+        created_at = CURRENT_TIMESTAMP, last_accessed = CURRENT_TIMESTAMP
+    WHERE start_id = ? AND end_id = ?
+'''
+
+_SQL_INSERT_ROUTE = '''
+    INSERT INTO cached_routes 
+    (start_id, end_id, route_data, distance, travel_time, nodes_count, created_at, last_accessed)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+'''
+
+# Rewrites an existing route in place like _SQL_UPDATE_ROUTE, keeping its
+# row and access_count (INSERT OR REPLACE would delete and re-add it)
+_SQL_UPSERT_ROUTE = '''
+    INSERT INTO cached_routes 
+    (start_id, end_id, route_data, distance, travel_time, nodes_count, created_at, last_accessed)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON CONFLICT(start_id, end_id) DO UPDATE SET
+        route_data = excluded.route_data, distance = excluded.distance,
+        travel_time = excluded.travel_time, nodes_count = excluded.nodes_count,
+        created_at = CURRENT_TIMESTAMP, last_accessed = CURRENT_TIMESTAMP
+'''
+
+# Prepared statements kept per connection
+_STATEMENT_CACHE_SIZE = 256
+
+# Connections inherited from a parent process. They are kept referenced and
+# never used: letting one be garbage-collected in the child would close the
+# parent's SQLite handle (and drop its file locks) from the wrong process.
+_INHERITED_CONNECTIONS: List[sqlite3.Connection] = []
+
+
+def _reset_in_child(cache_ref: weakref.ref) -> None:
+    """os.register_at_fork hook; the weak reference lets caches be collected"""
+    cache = cache_ref()
+    if cache is not None:
+        cache._reset_after_fork()
+
 
 class DestinationCache:
     """
@@ -19,6 +92,9 @@ class DestinationCache:
     Uses absolute paths for database location
     """
     
+    # Seconds between background refreshes of the top-routes snapshot
+    TOP_ROUTES_REFRESH_INTERVAL = 30.0
+    
     def __init__(self, db_path: str = None):
         """
         Initialize route cache
@@ -34,6 +110,12 @@ class DestinationCache:
         
         logger.info(f"Cache database path: {self.db_path}")
         
+        # One connection per process, opened lazily so that pre-fork
+        # servers (gunicorn --preload) never share a SQLite handle
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._lock = threading.RLock()
+        
         # Initialize database
         self.init_database()
         
@@ -46,10 +128,107 @@ class DestinationCache:
         }
         
         self._update_stats()
+        
+        # Most-accessed routes, refreshed out-of-band for the statistics endpoint
+        self._top_routes_snapshot: List[Dict] = []
+        self._snapshot_lock = threading.Lock()
+        self._stop_event = threading.Event()  # stops the current refresher
+        self._shut_down = False
+        # Started lazily by the first statistics call in each process, so a
+        # pre-fork master never runs it (see _ensure_refresher)
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_pid: Optional[int] = None
+        
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=partial(_reset_in_child, weakref.ref(self)))
+    
+    def _reset_after_fork(self) -> None:
+        """
+        Give a forked child its own locks, connection and refresher
+        
+        Another thread of the parent (e.g. the refresher) may have held a
+        lock at fork time, and it does not exist in the child to release it.
+        """
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher = None
+        self._refresher_pid = None
+        if self._conn is not None and self._conn_pid != os.getpid():
+            _INHERITED_CONNECTIONS.append(self._conn)
+            self._conn = None
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this process's SQLite connection, reopening it after a fork"""
+        pid = os.getpid()
+        if self._conn is None or self._conn_pid != pid:
+            # A handle inherited from the parent must not be reused or closed here
+            if self._conn is not None:
+                _INHERITED_CONNECTIONS.append(self._conn)
+            self._conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=_STATEMENT_CACHE_SIZE
+            )
+            self._conn_pid = pid
+        return self._conn
+    
+    def _ensure_refresher(self):
+        """Start the top-routes refresher in this process if it isn't running"""
+        pid = os.getpid()
+        if self._refresher_pid == pid and self._refresher.is_alive():
+            return
+        if self._shut_down:
+            return
+        
+        # The snapshot may be missing or inherited from the parent; fill it
+        # now rather than one interval later
+        self._refresh_top_routes()
+        self._stop_event = threading.Event()
+        self._refresher = threading.Thread(
+            target=self._top_routes_loop,
+            args=(self._stop_event,),
+            name="top-routes-refresher",
+            daemon=True
+        )
+        self._refresher_pid = pid
+        self._refresher.start()
+    
+    def _stop_refresher(self, timeout: Optional[float] = None) -> bool:
+        """Stop this process's refresher thread; returns whether one was running"""
+        if (self._refresher is None or self._refresher_pid != os.getpid()
+                or not self._refresher.is_alive()):
+            return False
+        self._stop_event.set()
+        self._refresher.join(timeout=timeout)
+        return True
+    
+    @contextmanager
+    def refresher_paused(self):
+        """
+        Keep the top-routes refresher stopped inside the block
+        
+        Use around forking worker processes: a thread running at fork time
+        may hold locks (here or in sqlite3, logging, ...) that the child
+        inherits held, with no thread left to release them.
+        """
+        was_running = self._stop_refresher()
+        try:
+            yield
+        finally:
+            if was_running:
+                self._ensure_refresher()
     
     def init_database(self):
         """Create database tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
+        with self._lock:
+            self._create_tables()
+        
+        logger.info(f"Cache database initialized: {self.db_path}")
+    
+    def _create_tables(self):
+        """Create schema on the current connection"""
+        conn = self._connection()
         cursor = conn.cursor()
         
         # Routes table
@@ -95,33 +274,39 @@ class DestinationCache:
         cursor.execute('INSERT OR IGNORE INTO cache_stats (id) VALUES (1)')
         
         conn.commit()
-        conn.close()
-        
-        logger.info(f"Cache database initialized: {self.db_path}")
     
     def cache_route(self, start_id: int, end_id: int, route: List[int], 
                    distance: float, travel_time: float) -> bool:
         """Store a route in the cache"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             route_blob = pickle.dumps({
                 'path': route,
                 'distance': distance,
                 'travel_time': travel_time
             })
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO cached_routes 
-                (start_id, end_id, route_data, distance, travel_time, nodes_count, created_at, last_accessed)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ''', (start_id, end_id, route_blob, distance, travel_time, len(route)))
-            
-            conn.commit()
-            conn.close()
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.cursor()
+                
+                # Update in place first so cache_size only grows on a real insert
+                cursor.execute(
+                    _SQL_UPDATE_ROUTE,
+                    (route_blob, distance, travel_time, len(route), start_id, end_id)
+                )
+                
+                inserted = cursor.rowcount == 0
+                if inserted:
+                    cursor.execute(
+                        _SQL_INSERT_ROUTE,
+                        (start_id, end_id, route_blob, distance, travel_time, len(route))
+                    )
+                
+                conn.commit()
+                
+                if inserted:
+                    self.stats['cache_size'] += 1
             
-            self._update_stats()
             logger.debug(f"Cached route: {start_id} -> {end_id}")
             return True
             
@@ -129,60 +314,95 @@ class DestinationCache:
             logger.error(f"Error caching route: {e}")
             return False
     
+    def cache_routes_bulk(self, rows: Iterable[Tuple[int, int, List[int], float, float]]) -> int:
+        """
+        Store many routes in a single transaction
+        
+        Args:
+            rows: Iterable of (start_id, end_id, path, distance, travel_time)
+            
+        Returns:
+            Number of routes written
+        """
+        params = [
+            (start_id, end_id,
+             pickle.dumps({'path': path, 'distance': distance, 'travel_time': travel_time}),
+             distance, travel_time, len(path))
+            for start_id, end_id, path, distance, travel_time in rows
+        ]
+        if not params:
+            return 0
+        
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(_SQL_UPSERT_ROUTE, params)
+                
+                # One count per batch instead of one per row
+                self._update_stats()
+            
+            logger.debug(f"Cached {len(params)} routes in bulk")
+            return len(params)
+            
+        except Exception as e:
+            logger.error(f"Error bulk caching routes: {e}")
+            return 0
+    
     def get_cached_route(self, start_id: int, end_id: int) -> Optional[Dict]:
         """Retrieve a cached route"""
+        return self._lookup_route(start_id, end_id, bidirectional=False)
+    
+    def _lookup_route(self, start_id: int, end_id: int, bidirectional: bool) -> Optional[Dict]:
+        """
+        Fetch a route with a single query
+        
+        With bidirectional=True a route stored as end_id -> start_id also
+        matches; its path is returned reversed.
+        """
         self.stats['total_queries'] += 1
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT route_data, distance, travel_time, nodes_count 
-                FROM cached_routes 
-                WHERE start_id = ? AND end_id = ?
-            ''', (start_id, end_id))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                cursor.execute('''
-                    UPDATE cached_routes 
-                    SET last_accessed = CURRENT_TIMESTAMP,
-                        access_count = access_count + 1
-                    WHERE start_id = ? AND end_id = ?
-                ''', (start_id, end_id))
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.cursor()
                 
-                cursor.execute('''
-                    UPDATE cache_stats 
-                    SET total_hits = total_hits + 1
-                    WHERE id = 1
-                ''')
+                if bidirectional:
+                    cursor.execute(_SQL_SELECT_ROUTE_EITHER,
+                                   (start_id, end_id, end_id, start_id, start_id))
+                else:
+                    cursor.execute(_SQL_SELECT_ROUTE, (start_id, end_id))
+                result = cursor.fetchone()
                 
-                conn.commit()
-                conn.close()
+                reverse = result is not None and result[4] != start_id
+                if result:
+                    cursor.execute(_SQL_TOUCH_ROUTE,
+                                   (end_id, start_id) if reverse else (start_id, end_id))
+                    cursor.execute(_SQL_COUNT_HIT)
+                else:
+                    cursor.execute(_SQL_COUNT_MISS)
                 
+                conn.commit()
+            
+            if result:
                 route_data = pickle.loads(result[0])
                 
                 self.stats['hits'] += 1
                 logger.debug(f"Cache HIT: {start_id} -> {end_id}")
                 
+                path = route_data['path']
+                if reverse:
+                    path = path[::-1]
+                    logger.debug(f"Using reversed cached route")
+                
                 return {
-                    'path': route_data['path'],
+                    'path': path,
                     'distance': result[1],
                     'travel_time': result[2],
                     'nodes_count': result[3],
                     'cached': True
                 }
             else:
-                cursor.execute('''
-                    UPDATE cache_stats 
-                    SET total_misses = total_misses + 1
-                    WHERE id = 1
-                ''')
-                conn.commit()
-                conn.close()
-                
                 self.stats['misses'] += 1
                 logger.debug(f"Cache MISS: {start_id} -> {end_id}")
                 return None
@@ -191,44 +411,41 @@ class DestinationCache:
             logger.error(f"Error retrieving cached route: {e}")
             return None
     
+    def get_cached_keys(self) -> Set[Tuple[int, int]]:
+        """Get (start_id, end_id) of every cached route in one query"""
+        try:
+            with self._lock:
+                cursor = self._connection().cursor()
+                cursor.execute('SELECT start_id, end_id FROM cached_routes')
+                return set(cursor.fetchall())
+        except Exception as e:
+            logger.error(f"Error listing cached routes: {e}")
+            return set()
+    
     def get_bidirectional_route(self, start_id: int, end_id: int) -> Optional[Dict]:
-        """Try to get route in both directions"""
-        route = self.get_cached_route(start_id, end_id)
-        if route:
-            return route
-        
-        reverse_route = self.get_cached_route(end_id, start_id)
-        if reverse_route:
-            reverse_route['path'] = list(reversed(reverse_route['path']))
-            logger.debug(f"Using reversed cached route")
-            return reverse_route
-        
-        return None
+        """Try to get route in both directions (one query)"""
+        return self._lookup_route(start_id, end_id, bidirectional=True)
     
     def get_cache_statistics(self) -> Dict:
         """Get detailed cache statistics"""
+        self._ensure_refresher()
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM cached_routes')
-            total_routes = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT total_hits, total_misses, last_cleanup 
-                FROM cache_stats WHERE id = 1
-            ''')
-            stats_row = cursor.fetchone()
-            
-            cursor.execute('''
-                SELECT start_id, end_id, access_count, distance 
-                FROM cached_routes 
-                ORDER BY access_count DESC 
-                LIMIT 10
-            ''')
-            top_routes = cursor.fetchall()
+            with self._lock:
+                cursor = self._connection().cursor()
+                
+                cursor.execute('SELECT COUNT(*) FROM cached_routes')
+                total_routes = cursor.fetchone()[0]
+                self.stats['cache_size'] = total_routes
+                
+                cursor.execute('''
+                    SELECT total_hits, total_misses, last_cleanup 
+                    FROM cache_stats WHERE id = 1
+                ''')
+                stats_row = cursor.fetchone()
             
-            conn.close()
+            with self._snapshot_lock:
+                top_routes = list(self._top_routes_snapshot)
             
             total_hits = stats_row[0] if stats_row else 0
             total_misses = stats_row[1] if stats_row else 0
@@ -242,44 +459,80 @@ class DestinationCache:
                 'total_queries': total_queries,
                 'hit_rate': hit_rate,
                 'last_cleanup': stats_row[2] if stats_row else None,
-                'top_routes': [
-                    {
-                        'start_id': r[0],
-                        'end_id': r[1],
-                        'access_count': r[2],
-                        'distance': r[3]
-                    }
-                    for r in top_routes
-                ]
+                'top_routes': top_routes
             }
             
         except Exception as e:
             logger.error(f"Error getting statistics: {e}")
             return {}
     
+    def _refresh_top_routes(self):
+        """Recompute the most-accessed routes snapshot"""
+        try:
+            with self._lock:
+                cursor = self._connection().cursor()
+                cursor.execute('''
+                    SELECT start_id, end_id, access_count, distance 
+                    FROM cached_routes 
+                    ORDER BY access_count DESC 
+                    LIMIT 10
+                ''')
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error refreshing top routes: {e}")
+            return
+        
+        snapshot = [
+            {
+                'start_id': r[0],
+                'end_id': r[1],
+                'access_count': r[2],
+                'distance': r[3]
+            }
+            for r in rows
+        ]
+        with self._snapshot_lock:
+            self._top_routes_snapshot = snapshot
+    
+    def _top_routes_loop(self, stop_event: threading.Event):
+        """Background loop refreshing the top-routes snapshot until stopped"""
+        while not stop_event.wait(self.TOP_ROUTES_REFRESH_INTERVAL):
+            self._refresh_top_routes()
+    
+    def shutdown(self):
+        """Stop the background refresher and close this process's connection"""
+        self._shut_down = True
+        self._stop_refresher(timeout=1.0)
+        
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+    
     def _update_stats(self):
         """Update internal statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM cached_routes')
-            self.stats['cache_size'] = cursor.fetchone()[0]
-            conn.close()
+            with self._lock:
+                cursor = self._connection().cursor()
+                cursor.execute('SELECT COUNT(*) FROM cached_routes')
+                self.stats['cache_size'] = cursor.fetchone()[0]
         except Exception as e:
             logger.error(f"Error updating stats: {e}")
     
     def clear_cache(self) -> bool:
         """Clear all cached routes"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM cached_routes')
-            cursor.execute('UPDATE cache_stats SET total_routes = 0 WHERE id = 1')
-            conn.commit()
-            conn.close()
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM cached_routes')
+                cursor.execute('UPDATE cache_stats SET total_routes = 0 WHERE id = 1')
+                conn.commit()
+                self.stats['cache_size'] = 0
             
             logger.info("Cache cleared")
-            self._update_stats()
+            with self._snapshot_lock:
+                self._top_routes_snapshot = []
             return True
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
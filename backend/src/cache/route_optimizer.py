@@ -2,7 +2,10 @@
 Route optimizer that uses cached routes intelligently
 """
 
+import os
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional, Dict
 from ..core.graph import Graph
 from ..algorithms.astar import AStar
@@ -10,6 +13,25 @@ from .destination_cache import DestinationCache
 
 logger = logging.getLogger(__name__)
 
+# Pathfinder for precompute worker processes (set by _init_precompute_worker)
+_worker_pathfinder: Optional[AStar] = None
+
+
+def _init_precompute_worker(graph: Graph) -> None:
+    """Build the worker's pathfinder once; the graph is inherited via fork"""
+    global _worker_pathfinder
+    _worker_pathfinder = AStar(graph)
+
+
+def _precompute_pair(pair: tuple) -> Optional[tuple]:
+    """Run A* for one pair in a worker; returns a cache_routes_bulk row"""
+    start_id, end_id = pair
+    details = _worker_pathfinder.find_path_with_details(start_id, end_id)
+    if not details:
+        return None
+    return (start_id, end_id, details['path'],
+            details['total_distance'], details['total_time'])
+
 
 class RouteOptimizer:
     """
@@ -104,41 +126,74 @@ class RouteOptimizer:
         return None
     
     def precompute_routes(self, poi_pairs: List[tuple[int, int]], 
-                         progress_callback=None) -> int:
+                         progress_callback=None,
+                         max_workers: Optional[int] = None) -> int:
         """
         Pre-calculate routes between important locations
         
+        Pairs with start == end and pairs already in the cache are skipped.
+        The rest are computed in worker processes (forked, so the graph is
+        shared rather than pickled; the cache's refresher thread is paused
+        meanwhile) and written to the cache in one transaction.
+        
         Args:
             poi_pairs: List of (start_id, end_id) tuples
             progress_callback: Optional function to report progress
+            max_workers: Worker processes (default: CPU count; 1 = in-process)
             
         Returns:
             Number of routes successfully cached
         """
-        logger.info(f"Pre-computing {len(poi_pairs)} routes...")
-        cached_count = 0
-        
-        for i, (start_id, end_id) in enumerate(poi_pairs):
-            # Check if already cached
-            if self.cache.get_cached_route(start_id, end_id):
-                logger.debug(f"Route {start_id}->{end_id} already cached")
-                continue
-            
-            # Calculate and cache
-            route = self.find_route(start_id, end_id, use_cache=False)
-            if route:
-                self.cache.cache_route(
-                    start_id, end_id,
-                    route['path'],
-                    route['distance'],
-                    route['travel_time']
-                )
-                cached_count += 1
-                logger.debug(f"Pre-computed route {i+1}/{len(poi_pairs)}")
-            
-            # Report progress
-            if progress_callback:
-                progress_callback(i + 1, len(poi_pairs))
+        # A pair with start == end has no route to compute or cache
+        pairs = [(start_id, end_id) for start_id, end_id in poi_pairs if start_id != end_id]
+        if len(pairs) < len(poi_pairs):
+            logger.debug(f"Skipping {len(poi_pairs) - len(pairs)} pairs with start == end")
+        
+        logger.info(f"Pre-computing {len(pairs)} routes...")
+        total = len(pairs)
+        
+        # Single cache check for all pairs
+        cached_keys = self.cache.get_cached_keys()
+        pending = [pair for pair in pairs if pair not in cached_keys]
+        done = total - len(pending)
+        logger.debug(f"{done} routes already cached")
+        if progress_callback and done:
+            progress_callback(done, total)
+        
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(pending))
+        
+        rows = []
+        if max_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # No cache thread may be running (and holding locks) at fork time
+            with self.cache.refresher_paused(), \
+                    ProcessPoolExecutor(max_workers=max_workers,
+                                        mp_context=multiprocessing.get_context('fork'),
+                                        initializer=_init_precompute_worker,
+                                        initargs=(self.graph,)) as executor:
+                chunksize = max(1, len(pending) // (max_workers * 4))
+                for row in executor.map(_precompute_pair, pending, chunksize=chunksize):
+                    if row:
+                        rows.append(row)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+        else:
+            for start_id, end_id in pending:
+                details = self.pathfinder.find_path_with_details(start_id, end_id)
+                if details:
+                    rows.append((start_id, end_id, details['path'],
+                                 details['total_distance'], details['total_time']))
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+        
+        self.stats['total_requests'] += len(pending)
+        self.stats['new_calculations'] += len(rows)
+        
+        # One batched write on the main process
+        cached_count = self.cache.cache_routes_bulk(rows)
         
         logger.info(f"Pre-computed {cached_count} new routes")
         return cached_count
@@ -3,9 +3,11 @@ Edge class representing connections between nodes in the road network
 """
 
 from typing import Dict, Optional
-from dataclasses import dataclass, field
+from dataclasses import field
 from enum import Enum
 
+from ..utils.slots import slotted_dataclass
+
 
 class RoadType(Enum):
     """Common road types from OpenStreetMap"""
@@ -22,7 +24,28 @@ class RoadType(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+# Default speed per road type (km/h)
+_DEFAULT_SPEED: Dict[RoadType, float] = {
+    RoadType.MOTORWAY: 120,
+    RoadType.TRUNK: 100,
+    RoadType.PRIMARY: 80,
+    RoadType.SECONDARY: 60,
+    RoadType.TERTIARY: 50,
+    RoadType.RESIDENTIAL: 30,
+    RoadType.SERVICE: 20,
+    RoadType.FOOTWAY: 5,
+    RoadType.CYCLEWAY: 15,
+    RoadType.PATH: 5,
+    RoadType.UNKNOWN: 50
+}
+
+# Seconds per meter at each default speed, so unset limits skip the division
+_DEFAULT_INV_SPEED: Dict[RoadType, float] = {
+    road_type: 3.6 / speed for road_type, speed in _DEFAULT_SPEED.items()
+}
+
+
+@slotted_dataclass
 class Edge:
     """
     Represents an edge (road segment) between two nodes
@@ -33,9 +56,13 @@ class Edge:
         weight: Edge weight (distance in meters)
         road_type: Type of road (highway classification)
         max_speed: Maximum speed limit (km/h)
-        tags: Additional properties from OSM
+        tags: Additional properties from OSM (may be shared between edges;
+            treat as read-only)
         bidirectional: Whether traffic can flow both ways
         name: Street/road name
+    
+    Travel time uses a seconds-per-meter factor cached from max_speed and
+    road_type; change the speed limit through set_max_speed().
     """
     
     from_node_id: int
@@ -46,6 +73,7 @@ class Edge:
     tags: Dict[str, str] = field(default_factory=dict)
     bidirectional: bool = True
     name: Optional[str] = None
+    _inv_speed: float = field(default=0.0, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Initialize default values and validate"""
@@ -54,6 +82,29 @@ class Edge:
         
         if self.from_node_id == self.to_node_id:
             raise ValueError("Edge cannot connect a node to itself")
+        
+        self._refresh_inv_speed()
+    
+    def __setstate__(self, state) -> None:
+        """Restore pickled edges, including ones saved without the cached factor"""
+        if isinstance(state, tuple):
+            # (__dict__ state, slot state) as pickled from a slotted instance
+            state = {**(state[0] or {}), **state[1]}
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        self._refresh_inv_speed()
+    
+    def _refresh_inv_speed(self) -> None:
+        """Cache seconds per meter at max_speed (or the road type default)"""
+        if self.max_speed:
+            self._inv_speed = 3.6 / self.max_speed
+        else:
+            self._inv_speed = _DEFAULT_INV_SPEED.get(self.road_type, 3.6 / 50)
+    
+    def set_max_speed(self, max_speed: Optional[int]) -> None:
+        """Set the speed limit (km/h) and update the cached travel-time factor"""
+        self.max_speed = max_speed
+        self._refresh_inv_speed()
     
     def travel_time(self, speed_kmh: Optional[float] = None) -> float:
         """
@@ -66,7 +117,7 @@ class Edge:
             Travel time in seconds
         """
         if speed_kmh is None:
-            speed_kmh = self.max_speed or self.get_default_speed()
+            return self.weight * self._inv_speed
         
         # Convert weight (meters) to km and calculate time
         distance_km = self.weight / 1000.0
@@ -75,20 +126,7 @@ class Edge:
     
     def get_default_speed(self) -> float:
         """Get default speed based on road type (km/h)"""
-        speed_map = {
-            RoadType.MOTORWAY: 120,
-            RoadType.TRUNK: 100,
-            RoadType.PRIMARY: 80,
-            RoadType.SECONDARY: 60,
-            RoadType.TERTIARY: 50,
-            RoadType.RESIDENTIAL: 30,
-            RoadType.SERVICE: 20,
-            RoadType.FOOTWAY: 5,
-            RoadType.CYCLEWAY: 15,
-            RoadType.PATH: 5,
-            RoadType.UNKNOWN: 50
-        }
-        return speed_map.get(self.road_type, 50)
+        return _DEFAULT_SPEED.get(self.road_type, 50)
     
     def is_highway(self) -> bool:
         """Check if this is a major highway"""
@@ -8,18 +8,172 @@ Optimized for pathfinding operations with spatial indexing
 FIXED: Handles large graphs without recursion errors
 """
 
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
+import hashlib
 import math
+import os
 import pickle
 import logging
 import sys
-from collections import defaultdict
-from .node import Node
-from .edge import Edge, RoadType
+from array import array
+
+import numpy as np
+import orjson
+
+from .node import AdjacencyVersion, Node
+from .edge import Edge, RoadType, _DEFAULT_SPEED
+from ..utils.jit import njit, FASTMATH
+from ..utils.geo_utils import haversine_rad, haversine_vec
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # batched nearest-node lookups fall back to the grid
+    cKDTree = None
 
 
 logger = logging.getLogger(__name__)
 
+GRAPH_FORMAT_VERSION = '3.1'
+
+# save_to_file writes a zip archive (npz); anything else is treated as a pickle
+_NPZ_MAGIC = b'PK\x03\x04'
+
+# Road types are stored as int8 codes into this table
+_ROAD_TYPES = list(RoadType)
+_ROAD_TYPE_CODES = {road_type: code for code, road_type in enumerate(_ROAD_TYPES)}
+
+# One record per edge in saved archives (max_speed is NaN when unset)
+_EDGE_DTYPE = np.dtype([
+    ('from', np.int64),
+    ('to', np.int64),
+    ('weight', np.float64),
+    ('road_type', np.int8),
+    ('max_speed', np.float64),
+    ('bidirectional', np.bool_)
+])
+
+
+def _encode_coordinates(lats: np.ndarray, lons: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Archive arrays for node coordinates
+    
+    OSM coordinates have 7 decimals, so they are stored as int32 multiples
+    of 1e-7 degrees (half the size of float64) whenever that round-trips
+    exactly; otherwise (e.g. hand-placed nodes) as float64.
+    """
+    lat_e7 = np.round(lats * 1e7)
+    lon_e7 = np.round(lons * 1e7)
+    if np.array_equal(lat_e7 / 1e7, lats) and np.array_equal(lon_e7 / 1e7, lons):
+        return {'lat_e7': lat_e7.astype(np.int32), 'lon_e7': lon_e7.astype(np.int32)}
+    return {'lat': lats, 'lon': lons}
+
+
+def _decode_coordinates(arrays: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Node latitudes and longitudes (float64) from archive arrays"""
+    if 'lat_e7' in arrays:
+        return arrays['lat_e7'] / 1e7, arrays['lon_e7'] / 1e7
+    return arrays['lat'], arrays['lon']
+
+
+def _intern_tags(tags: Dict[str, str], table: Dict[frozenset, Dict[str, str]]) -> Dict[str, str]:
+    """Return one shared dict per distinct set of tags (tags are read-only)"""
+    return table.setdefault(frozenset(tags.items()), tags)
+
+
+@njit('int64(int32[::1], int32[::1])', cache=True)
+def _cc_count(indptr, indices):
+    """Count components by BFS from every unvisited node over CSR adjacency"""
+    node_count = len(indptr) - 1
+    visited = np.zeros(node_count, dtype=np.uint8)
+    queue = np.empty(node_count, dtype=np.int32)
+    components = 0
+    
+    for seed in range(node_count):
+        if visited[seed]:
+            continue
+        visited[seed] = 1
+        queue[0] = seed
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            for k in range(indptr[current], indptr[current + 1]):
+                neighbor = indices[k]
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    queue[tail] = neighbor
+                    tail += 1
+        components += 1
+    
+    return components
+
+
+@njit('Tuple((int64, float64))(float64, float64, float64, float64[::1], float64[::1], '
+      'float64[::1], int64[::1], int64[::1], int64[::1])', cache=True, fastmath=FASTMATH)
+def _nearest_in_cells(lat, lon, max_distance, lat_rad, lon_rad, cos_lat,
+                      cell_indptr, cell_nodes, cells):
+    """
+    Find the closest node within max_distance among the given grid cells
+    
+    Returns:
+        (node index, distance in meters); index is -1 if nothing is in range
+    """
+    lat1_rad = math.radians(lat)
+    lon1_rad = math.radians(lon)
+    cos_lat1 = math.cos(lat1_rad)
+    
+    best_idx = -1
+    best_distance = np.inf
+    for c in cells:
+        if c < 0:
+            continue
+        for k in range(cell_indptr[c], cell_indptr[c + 1]):
+            i = cell_nodes[k]
+            distance = haversine_rad(lat1_rad, cos_lat1, lat_rad[i], cos_lat[i],
+                                     lon_rad[i] - lon1_rad)
+            
+            if distance < best_distance and distance <= max_distance:
+                best_distance = distance
+                best_idx = i
+    
+    return best_idx, best_distance
+
+
+@njit('Tuple((int64[::1], float64[::1]))(float64, float64, float64, float64[::1], float64[::1], '
+      'int64[::1], int64[::1], int64[::1])', cache=True, fastmath=FASTMATH)
+def _nodes_in_cells(lat, lon, radius, lats, lons, cell_indptr, cell_nodes, cells):
+    """
+    Collect all nodes within radius among the given grid cells
+    
+    Uses an equirectangular projection around the query point, which is
+    well within 1% of Haversine at the radii used for snapping and POI
+    lookups, and compares squared distances so only matches pay a sqrt.
+    
+    Returns:
+        (node indices, squared distances in meters^2) in scan order
+    """
+    lat0_rad = math.radians(lat)
+    lon0_rad = math.radians(lon)
+    cos_lat0 = math.cos(lat0_rad)
+    radius_sq = radius * radius
+    
+    found_idx = []
+    found_distance_sq = []
+    for c in cells:
+        if c < 0:
+            continue
+        for k in range(cell_indptr[c], cell_indptr[c + 1]):
+            i = cell_nodes[k]
+            dx = (math.radians(lons[i]) - lon0_rad) * cos_lat0 * 6371000
+            dy = (math.radians(lats[i]) - lat0_rad) * 6371000
+            distance_sq = dx * dx + dy * dy
+            
+            if distance_sq <= radius_sq:
+                found_idx.append(i)
+                found_distance_sq.append(distance_sq)
+    
+    return np.array(found_idx, dtype=np.int64), np.array(found_distance_sq, dtype=np.float64)
+
 
 class Graph:
     """
@@ -31,18 +185,65 @@ class Graph:
     - Edge management with bidirectional support
     - Graph statistics and validation
     - Handles large graphs (50k+ nodes)
+    - CSR adjacency arrays for array-based search (see build_csr)
     """
     
     def __init__(self):
         self.nodes: Dict[int, Node] = {}
         self.edges: Dict[Tuple[int, int], Edge] = {}
-        self._spatial_index: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
         self._grid_size = 0.001  # ~100m grid cells for spatial indexing
         
+        # CSR adjacency (node i's neighbors are indices[indptr[i]:indptr[i+1]])
+        self.id_to_idx: Dict[int, int] = {}
+        self.idx_to_id = np.empty(0, dtype=np.int64)
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.float32)
+        # Attributes of the edge behind each arc, aligned with indices
+        self.edge_road_type = np.empty(0, dtype=np.int8)
+        self.edge_max_speed = np.empty(0, dtype=np.int32)
+        self.node_lat = np.empty(0, dtype=np.float64)
+        self.node_lon = np.empty(0, dtype=np.float64)
+        # Per-node radians and cos(latitude), reused by every haversine_rad call
+        self.node_lat_rad = np.empty(0, dtype=np.float64)
+        self.node_lon_rad = np.empty(0, dtype=np.float64)
+        self.node_cos_lat = np.empty(0, dtype=np.float64)
+        
+        # Flat spatial grid: sorted packed cell keys, CSR of node indices per cell
+        self.grid_keys = np.empty(0, dtype=np.int64)
+        self.grid_indptr = np.zeros(1, dtype=np.int64)
+        self.grid_node_idx = np.empty(0, dtype=np.int64)
+        self.csr_version = 0
+        self._csr_dirty = True
+        # Neighbor changes on this graph's nodes bump _adjacency; it and the
+        # node/edge counts are recorded at each CSR build, so direct Node,
+        # self.nodes and self.edges edits also mark the arrays stale
+        self._adjacency = AdjacencyVersion()
+        self._csr_adjacency_version = -1
+        self._csr_node_count = -1
+        self._csr_edge_count = -1
+        
+        # Node coordinates in a local metric frame (see project_local) and a
+        # KD-tree over them, both refreshed lazily after build_csr
+        self.node_xy = np.empty((0, 2), dtype=np.float64)
+        self._proj_origin: Optional[Tuple[float, float]] = None
+        self._proj_version = -1
+        self._kdtree = None
+        self._kdtree_version = -1
+        
+        # Edges grouped by road type (see get_edges_by_road_type)
+        self._edges_by_type: Dict[RoadType, Dict[Tuple[int, int], Edge]] = {}
+        # Speed limits from before the first scale_max_speeds call, per edge
+        # key and per CSR arc, so later calls scale from them again
+        self._base_max_speeds: Dict[Tuple[int, int], Optional[int]] = {}
+        self._scaled_road_types: Set[RoadType] = set()
+        self._arc_base_max_speed = np.empty(0, dtype=np.int32)
+        
         # Statistics
         self.stats = {
             'node_count': 0,
             'edge_count': 0,
+            'arc_count': 0,
             'intersection_count': 0,
             'dead_end_count': 0
         }
@@ -59,7 +260,8 @@ class Graph:
             return
         
         self.nodes[node.id] = node
-        self._add_to_spatial_index(node)
+        node._version = self._adjacency
+        self._csr_dirty = True
         self._update_stats()
     
     def add_edge(self, edge: Edge) -> None:
@@ -75,8 +277,10 @@ class Graph:
         if edge.to_node_id not in self.nodes:
             raise ValueError(f"To node {edge.to_node_id} not found in graph")
         
-        # Add edge to edge dictionary
+        # Add edge to edge dictionary; a bidirectional edge is stored once,
+        # under its own direction, and serves lookups both ways (see get_edge)
         edge_key = (edge.from_node_id, edge.to_node_id)
+        self._index_edge(edge_key, edge)
         self.edges[edge_key] = edge
         
         # Add neighbor relationship to nodes
@@ -84,32 +288,114 @@ class Graph:
         to_node = self.nodes[edge.to_node_id]
         from_node.add_neighbor(to_node, edge.weight)
         
-        # If bidirectional, add reverse edge
+        # If bidirectional, the reverse direction is traversable too
         if edge.bidirectional:
-            reverse_key = (edge.to_node_id, edge.from_node_id)
-            if reverse_key not in self.edges:
-                reverse_edge = Edge(
-                    from_node_id=edge.to_node_id,
-                    to_node_id=edge.from_node_id,
-                    weight=edge.weight,
-                    road_type=edge.road_type,
-                    max_speed=edge.max_speed,
-                    tags=edge.tags.copy(),
-                    bidirectional=False,  # Avoid infinite recursion
-                    name=edge.name
-                )
-                self.edges[reverse_key] = reverse_edge
+            to_node.add_neighbor(from_node, edge.weight)
+        
+        self._csr_dirty = True
+        self._update_stats()
+    
+    def add_nodes_bulk(self, nodes: Iterable[Node]) -> int:
+        """
+        Add many nodes, updating stats once
+        
+        Unlike add_node, nodes whose ID already exists are skipped silently.
+        Nodes with equal tags end up sharing a single tags dict.
+        
+        Args:
+            nodes: Nodes to add
+            
+        Returns:
+            Number of nodes added
+        """
+        added = 0
+        interned_tags = {}
+        for node in nodes:
+            if node.id not in self.nodes:
+                node.tags = _intern_tags(node.tags, interned_tags)
+                self.nodes[node.id] = node
+                node._version = self._adjacency
+                added += 1
+        
+        self._csr_dirty = True
+        self._update_stats()
+        return added
+    
+    def add_edges_bulk(self, edges: Iterable[Edge]) -> int:
+        """
+        Add many edges, rebuilding CSR arrays and stats once
+        
+        Edges with equal tags end up sharing a single tags dict.
+        
+        Args:
+            edges: Edges to add; both endpoints must already be in the graph
+            
+        Returns:
+            Number of edges added
+        """
+        added = 0
+        interned_tags = {}
+        for edge in edges:
+            edge.tags = _intern_tags(edge.tags, interned_tags)
+            from_node = self.nodes.get(edge.from_node_id)
+            to_node = self.nodes.get(edge.to_node_id)
+            if from_node is None:
+                raise ValueError(f"From node {edge.from_node_id} not found in graph")
+            if to_node is None:
+                raise ValueError(f"To node {edge.to_node_id} not found in graph")
+            
+            edge_key = (edge.from_node_id, edge.to_node_id)
+            self._index_edge(edge_key, edge)
+            self.edges[edge_key] = edge
+            from_node.add_neighbor(to_node, edge.weight)
+            if edge.bidirectional:
                 to_node.add_neighbor(from_node, edge.weight)
+            added += 1
         
+        self.build_csr()
         self._update_stats()
+        return added
+    
+    def _index_edge(self, edge_key: Tuple[int, int], edge: Edge) -> None:
+        """Record an edge being stored under edge_key in the road type index"""
+        previous = self.edges.get(edge_key)
+        if previous is not None:
+            self._edges_by_type.get(previous.road_type, {}).pop(edge_key, None)
+            self._base_max_speeds.pop(edge_key, None)
+        self._edges_by_type.setdefault(edge.road_type, {})[edge_key] = edge
+    
+    def get_edges_by_road_type(self, road_type: RoadType) -> List[Edge]:
+        """
+        Get all edges of one road type without scanning every edge
+        
+        The index is kept up to date by add_edge / add_edges_bulk and
+        rebuilt if graph.edges was changed directly.
+        """
+        if sum(map(len, self._edges_by_type.values())) != len(self.edges):
+            self._edges_by_type = {}
+            for edge_key, edge in self.edges.items():
+                self._edges_by_type.setdefault(edge.road_type, {})[edge_key] = edge
+        return list(self._edges_by_type.get(road_type, {}).values())
     
     def get_node(self, node_id: int) -> Optional[Node]:
         """Get node by ID"""
         return self.nodes.get(node_id)
     
     def get_edge(self, from_id: int, to_id: int) -> Optional[Edge]:
-        """Get edge between two nodes"""
-        return self.edges.get((from_id, to_id))
+        """
+        Get edge between two nodes
+        
+        Bidirectional edges are stored once, so the returned edge may point
+        the other way (its from_node_id can be to_id).
+        """
+        edge = self.edges.get((from_id, to_id))
+        if edge is not None:
+            return edge
+        
+        edge = self.edges.get((to_id, from_id))
+        if edge is not None and edge.bidirectional:
+            return edge
+        return None
     
     def get_neighbors(self, node_id: int) -> List[Tuple[Node, float]]:
         """
@@ -124,6 +410,168 @@ class Graph:
         node = self.get_node(node_id)
         return node.neighbors if node else []
     
+    def build_csr(self) -> None:
+        """
+        Build CSR adjacency arrays from the node objects
+        
+        Call after loading or after a batch of add_edge calls. Nodes are
+        numbered in insertion order; id_to_idx / idx_to_id translate between
+        node IDs and array indices.
+        """
+        node_count = len(self.nodes)
+        id_to_idx = {node_id: i for i, node_id in enumerate(self.nodes)}
+        
+        # Arcs are collected straight into 4-byte typed arrays (no per-arc
+        # Python float/int objects) and wrapped without another copy
+        counts = np.zeros(node_count + 1, dtype=np.int32)
+        neighbor_idx = array('i')
+        neighbor_weight = array('f')
+        adjacency = self._adjacency
+        for i, node in enumerate(self.nodes.values()):
+            node._version = adjacency
+            for neighbor, weight in node.iter_neighbors():
+                j = id_to_idx.get(neighbor.id)
+                if j is not None:
+                    neighbor_idx.append(j)
+                    neighbor_weight.append(weight)
+                    counts[i + 1] += 1
+        
+        np.cumsum(counts, out=counts)
+        
+        self.id_to_idx = id_to_idx
+        self.idx_to_id = np.fromiter(self.nodes.keys(), dtype=np.int64, count=node_count)
+        self.indptr = counts
+        self.indices = np.frombuffer(neighbor_idx, dtype=np.int32)
+        self.weights = np.frombuffer(neighbor_weight, dtype=np.float32)
+        self.node_lat = np.fromiter((n.latitude for n in self.nodes.values()),
+                                    dtype=np.float64, count=node_count)
+        self.node_lon = np.fromiter((n.longitude for n in self.nodes.values()),
+                                    dtype=np.float64, count=node_count)
+        self._rebuild_edge_attributes()
+        self._rebuild_node_trig()
+        self._rebuild_spatial_index()
+        self._mark_csr_fresh()
+    
+    def _mark_csr_fresh(self) -> None:
+        """Record that the CSR arrays now match the node objects and edges"""
+        self.csr_version += 1
+        self._csr_dirty = False
+        self._csr_adjacency_version = self._adjacency.value
+        self._csr_node_count = len(self.nodes)
+        self._csr_edge_count = len(self.edges)
+    
+    def _rebuild_edge_attributes(self) -> None:
+        """
+        Fill edge_road_type / edge_max_speed for every CSR arc
+        
+        Speeds are effective limits (road type default when unset); arcs
+        without an Edge object count as unknown road type.
+        """
+        edges = self.edges
+        idx_to_id = self.idx_to_id.tolist()
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        
+        arc_edges = []
+        for i, from_id in enumerate(idx_to_id):
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                to_id = idx_to_id[j]
+                arc_edges.append(edges.get((from_id, to_id)) or edges.get((to_id, from_id)))
+        
+        unknown = _ROAD_TYPE_CODES[RoadType.UNKNOWN]
+        self.edge_road_type = np.fromiter(
+            (unknown if e is None else _ROAD_TYPE_CODES[e.road_type] for e in arc_edges),
+            dtype=np.int8, count=len(arc_edges)
+        )
+        self.edge_max_speed = np.fromiter(
+            (_DEFAULT_SPEED[RoadType.UNKNOWN] if e is None
+             else e.max_speed or _DEFAULT_SPEED.get(e.road_type, 50) for e in arc_edges),
+            dtype=np.int32, count=len(arc_edges)
+        )
+        base_speeds = self._base_max_speeds
+        self._arc_base_max_speed = np.fromiter(
+            (_DEFAULT_SPEED[RoadType.UNKNOWN] if e is None
+             else base_speeds.get((e.from_node_id, e.to_node_id), e.max_speed)
+             or _DEFAULT_SPEED.get(e.road_type, 50) for e in arc_edges),
+            dtype=np.int32, count=len(arc_edges)
+        ) if base_speeds else self.edge_max_speed
+    
+    def _rebuild_node_trig(self) -> None:
+        """Precompute the per-node trig terms from node_lat/node_lon"""
+        self.node_lat_rad = np.radians(self.node_lat)
+        self.node_lon_rad = np.radians(self.node_lon)
+        self.node_cos_lat = np.cos(self.node_lat_rad)
+    
+    def _rebuild_spatial_index(self) -> None:
+        """Bucket node indices by grid cell into sorted, CSR-style arrays"""
+        keys = self._pack_cell_keys(
+            np.trunc(self.node_lat / self._grid_size).astype(np.int64),
+            np.trunc(self.node_lon / self._grid_size).astype(np.int64)
+        )
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        
+        self.grid_keys = unique_keys
+        self.grid_indptr = np.append(starts, len(keys)).astype(np.int64)
+        self.grid_node_idx = order.astype(np.int64)
+    
+    @staticmethod
+    def _pack_cell_keys(grid_lat, grid_lon):
+        """Pack (grid_lat, grid_lon) cell coordinates into single int64 keys"""
+        return (grid_lat << 32) | (grid_lon & 0xFFFFFFFF)
+    
+    def _lookup_cells(self, grid_keys: List[Tuple[int, int]]) -> np.ndarray:
+        """Map (grid_lat, grid_lon) cells to positions in the flat grid (-1 if empty)"""
+        cells = np.array(grid_keys, dtype=np.int64).reshape(-1, 2)
+        return self._lookup_packed(self._pack_cell_keys(cells[:, 0], cells[:, 1]))
+    
+    def _cells_in_box(self, min_lat: float, max_lat: float,
+                      min_lon: float, max_lon: float) -> np.ndarray:
+        """Flat-grid positions of every cell overlapping a lat/lon box (-1 if empty)"""
+        lat_lo, lon_lo = self._get_grid_key(min_lat, min_lon)
+        lat_hi, lon_hi = self._get_grid_key(max_lat, max_lon)
+        grid_lat = np.arange(lat_lo, lat_hi + 1, dtype=np.int64)[:, None]
+        grid_lon = np.arange(lon_lo, lon_hi + 1, dtype=np.int64)[None, :]
+        return self._lookup_packed(self._pack_cell_keys(grid_lat, grid_lon).ravel())
+    
+    def _lookup_packed(self, packed: np.ndarray) -> np.ndarray:
+        """Map packed cell keys to positions in the flat grid (-1 if empty)"""
+        pos = np.searchsorted(self.grid_keys, packed)
+        pos[pos >= len(self.grid_keys)] = -1
+        found = pos >= 0
+        found[found] = self.grid_keys[pos[found]] == packed[found]
+        pos[~found] = -1
+        return pos
+    
+    def csr_is_stale(self) -> bool:
+        """True if nodes, edges or neighbor lists changed since the last CSR build"""
+        return (self._csr_dirty
+                or self._csr_adjacency_version != self._adjacency.value
+                or self._csr_node_count != len(self.nodes)
+                or self._csr_edge_count != len(self.edges))
+    
+    def ensure_csr(self) -> None:
+        """
+        Rebuild CSR arrays if the graph changed since the last build
+        
+        Catches changes made through Graph methods as well as direct
+        Node.add_neighbor / remove_neighbor / neighbors edits and writes
+        to self.nodes or self.edges. Node edits are tracked per graph: a
+        node reports to the graph that last added it or built CSR from it.
+        """
+        if self.csr_is_stale():
+            self.build_csr()
+    
+    def get_neighbors_csr(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get neighbors of a node by array index
+        
+        Returns:
+            (neighbor indices, edge weights) array views
+        """
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return self.indices[start:end], self.weights[start:end]
+    
     def find_nearest_node(self, lat: float, lon: float, max_distance: float = 1000) -> Optional[Node]:
         """
         Find the nearest node to given coordinates using spatial indexing
@@ -136,33 +584,151 @@ class Graph:
         Returns:
             Nearest node or None if none found within max_distance
         """
-        from ..utils.geo_utils import haversine_distance
-        
-        best_node = None
-        best_distance = float('inf')
+        self.ensure_csr()
         
         # Calculate search grid bounds
         lat_offset = (max_distance / 111111.0)  # Rough: 1 degree lat = 111km
         lon_offset = lat_offset / math.cos(math.radians(lat))
         
         # Search nearby grid cells
-        for search_lat in [lat - lat_offset, lat, lat + lat_offset]:
-            for search_lon in [lon - lon_offset, lon, lon + lon_offset]:
-                grid_key = self._get_grid_key(search_lat, search_lon)
-                
-                for node_id in self._spatial_index.get(grid_key, set()):
-                    node = self.nodes[node_id]
-                    distance = haversine_distance(lat, lon, node.latitude, node.longitude)
-                    
-                    if distance < best_distance and distance <= max_distance:
-                        best_distance = distance
-                        best_node = node
-        
-        return best_node
+        cells = self._lookup_cells([
+            self._get_grid_key(search_lat, search_lon)
+            for search_lat in (lat - lat_offset, lat, lat + lat_offset)
+            for search_lon in (lon - lon_offset, lon, lon + lon_offset)
+        ])
+        
+        best_idx, _ = _nearest_in_cells(
+            lat, lon, max_distance,
+            self.node_lat_rad, self.node_lon_rad, self.node_cos_lat,
+            self.grid_indptr, self.grid_node_idx, cells
+        )
+        
+        if best_idx < 0:
+            return None
+        return self.nodes[int(self.idx_to_id[best_idx])]
     
-    def find_nodes_in_radius(self, lat: float, lon: float, radius: float) -> List[Tuple[Node, float]]:
+    def find_nearest_nodes(self, lats: np.ndarray, lons: np.ndarray,
+                           max_distance: float = 1000) -> np.ndarray:
         """
-        Find all nodes within a given radius
+        Find the nearest node to each of many points in one batch
+        
+        Uses a KD-tree over the projected node coordinates (see
+        project_local) when scipy is available, otherwise calls
+        find_nearest_node per point.
+        
+        Args:
+            lats: Target latitudes
+            lons: Target longitudes
+            max_distance: Maximum search distance in meters
+            
+        Returns:
+            Node IDs (int64), -1 where no node is within max_distance
+        """
+        self.ensure_csr()
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        
+        if cKDTree is None or len(self.idx_to_id) == 0:
+            nearest = (self.find_nearest_node(lat, lon, max_distance)
+                       for lat, lon in zip(lats.tolist(), lons.tolist()))
+            return np.fromiter((-1 if node is None else node.id for node in nearest),
+                               dtype=np.int64, count=len(lats))
+        
+        tree = self._get_kdtree()
+        _, idx = tree.query(self._project(lats, lons), k=1,
+                            distance_upper_bound=max_distance)
+        
+        # Misses come back as idx == number of nodes
+        found = idx < len(self.idx_to_id)
+        node_ids = np.full(len(lats), -1, dtype=np.int64)
+        node_ids[found] = self.idx_to_id[idx[found]]
+        return node_ids
+    
+    def find_k_nearest_nodes(self, lat: float, lon: float,
+                             k: int = 1) -> List[Tuple[Node, float]]:
+        """
+        Find the k nodes closest to given coordinates
+        
+        Candidates come from the KD-tree over projected coordinates (or
+        every node without scipy) and are ranked by exact Haversine distance.
+        
+        Args:
+            lat: Target latitude
+            lon: Target longitude
+            k: Number of nodes to return
+            
+        Returns:
+            Up to k (node, distance in meters) tuples, closest first
+        """
+        self.ensure_csr()
+        node_count = len(self.idx_to_id)
+        if k <= 0 or node_count == 0:
+            return []
+        
+        if cKDTree is None:
+            candidates = np.arange(node_count)
+        else:
+            # A few spare candidates absorb the projection's small distortion
+            _, candidates = self._get_kdtree().query(
+                self._project(np.array([lat]), np.array([lon]))[0],
+                k=min(node_count, 2 * k)
+            )
+            candidates = np.atleast_1d(candidates)
+        
+        distances = haversine_vec(lat, lon, self.node_lat[candidates], self.node_lon[candidates])
+        order = np.argsort(distances, kind='stable')[:k]
+        return [
+            (self.nodes[int(self.idx_to_id[candidates[i]])], float(distances[i]))
+            for i in order
+        ]
+    
+    def project_local(self, lat0: Optional[float] = None,
+                      lon0: Optional[float] = None) -> np.ndarray:
+        """
+        Project all nodes into a local east/north frame in meters
+        
+        Equirectangular around (lat0, lon0), which is accurate to well under
+        a meter over city-sized areas. The origin is kept for later
+        rebuilds; by default it is the mean node position.
+        
+        Returns:
+            node_xy, an (N, 2) array aligned with the CSR node indices
+        """
+        self.ensure_csr()
+        if lat0 is None or lon0 is None:
+            lat0 = float(self.node_lat.mean()) if len(self.node_lat) else 0.0
+            lon0 = float(self.node_lon.mean()) if len(self.node_lon) else 0.0
+        
+        if self._proj_origin == (lat0, lon0) and self._proj_version == self.csr_version:
+            return self.node_xy
+        
+        self._proj_origin = (lat0, lon0)
+        self.node_xy = self._project(self.node_lat, self.node_lon)
+        self._proj_version = self.csr_version
+        self._kdtree_version = -1
+        return self.node_xy
+    
+    def _get_kdtree(self):
+        """KD-tree over node_xy, rebuilt after build_csr"""
+        if self._proj_version != self.csr_version:
+            self.project_local(*(self._proj_origin or (None, None)))
+        if self._kdtree_version != self.csr_version:
+            self._kdtree = cKDTree(self.node_xy)
+            self._kdtree_version = self.csr_version
+        return self._kdtree
+    
+    def _project(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Equirectangular projection to meters around the projection origin"""
+        lat0, lon0 = self._proj_origin
+        r = 6371000.0
+        x = np.radians(lons - lon0) * (math.cos(math.radians(lat0)) * r)
+        y = np.radians(lats - lat0) * r
+        return np.column_stack((x, y))
+    
+    def find_node_indices_in_radius(self, lat: float, lon: float,
+                                    radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find all nodes within a given radius as CSR indices
         
         Args:
             lat: Center latitude
@@ -170,34 +736,118 @@ class Graph:
             radius: Search radius in meters
             
         Returns:
-            List of (node, distance) tuples sorted by distance
+            (node indices, distances) arrays sorted by distance;
+            use idx_to_id to translate indices to node IDs. Distances use
+            an equirectangular approximation of Haversine.
         """
-        from ..utils.geo_utils import haversine_distance
-        
-        nodes_in_radius = []
+        self.ensure_csr()
         
         # Calculate search bounds
         lat_offset = (radius / 111111.0)
         lon_offset = lat_offset / math.cos(math.radians(lat))
         
         # Search grid cells
-        min_lat, max_lat = lat - lat_offset, lat + lat_offset
-        min_lon, max_lon = lon - lon_offset, lon + lon_offset
-        
-        for search_lat in [min_lat + i * self._grid_size for i in range(int((max_lat - min_lat) / self._grid_size) + 1)]:
-            for search_lon in [min_lon + i * self._grid_size for i in range(int((max_lon - min_lon) / self._grid_size) + 1)]:
-                grid_key = self._get_grid_key(search_lat, search_lon)
-                
-                for node_id in self._spatial_index.get(grid_key, set()):
-                    node = self.nodes[node_id]
-                    distance = haversine_distance(lat, lon, node.latitude, node.longitude)
-                    
-                    if distance <= radius:
-                        nodes_in_radius.append((node, distance))
+        cells = self._cells_in_box(lat - lat_offset, lat + lat_offset,
+                                   lon - lon_offset, lon + lon_offset)
+        
+        idx, distances_sq = _nodes_in_cells(
+            lat, lon, radius, self.node_lat, self.node_lon,
+            self.grid_indptr, self.grid_node_idx, cells
+        )
         
         # Sort by distance
-        nodes_in_radius.sort(key=lambda x: x[1])
-        return nodes_in_radius
+        order = np.argsort(distances_sq, kind='stable')
+        return idx[order], np.sqrt(distances_sq[order])
+    
+    def find_nodes_in_radius(self, lat: float, lon: float, radius: float) -> List[Tuple[Node, float]]:
+        """
+        Find all nodes within a given radius
+        
+        Args:
+            lat: Center latitude
+            lon: Center longitude
+            radius: Search radius in meters
+            
+        Returns:
+            List of (node, distance) tuples sorted by distance
+        """
+        idx, distances = self.find_node_indices_in_radius(lat, lon, radius)
+        return [
+            (self.nodes[node_id], distance)
+            for node_id, distance in zip(self.idx_to_id[idx].tolist(), distances.tolist())
+        ]
+    
+    def scale_max_speeds(self, factors: Dict[str, float]) -> int:
+        """
+        Scale every edge's speed limit by a per-road-type factor
+        
+        Only edges of road types with a factor other than 1 (or scaled by
+        an earlier call) are visited, via the road type index; their speeds
+        are scaled as one array multiply. Factors apply to the limits the
+        edges had before the first call, so calling again replaces the
+        previous factors instead of compounding them. Edges without a speed
+        limit are scaled from their road type default.
+        
+        Args:
+            factors: Road type value (e.g. 'primary') -> multiplier
+            
+        Returns:
+            Number of edges whose speed limit was scaled
+        """
+        lut = np.array([factors.get(road_type.value, 1.0) for road_type in _ROAD_TYPES],
+                       dtype=np.float64)
+        base_speeds = self._base_max_speeds
+        
+        adjusted = 0
+        for road_type in _ROAD_TYPES:
+            factor = lut[_ROAD_TYPE_CODES[road_type]]
+            if factor == 1.0 and road_type not in self._scaled_road_types:
+                continue
+            
+            edges = self.get_edges_by_road_type(road_type)
+            bases = [base_speeds.setdefault((e.from_node_id, e.to_node_id), e.max_speed)
+                     for e in edges]
+            if factor == 1.0:
+                for edge, base in zip(edges, bases):
+                    edge.set_max_speed(base)
+                self._scaled_road_types.discard(road_type)
+                continue
+            
+            speeds = np.fromiter((base or _DEFAULT_SPEED.get(road_type, 50) for base in bases),
+                                 dtype=np.int32, count=len(edges))
+            for edge, speed in zip(edges, (speeds * factor).astype(np.int32).tolist()):
+                edge.set_max_speed(speed)
+            self._scaled_road_types.add(road_type)
+            adjusted += len(edges)
+        
+        # Arc speeds come from the same edges, so the same multiply keeps them in step
+        if not self.csr_is_stale():
+            self.edge_max_speed = (self._arc_base_max_speed * lut[self.edge_road_type]).astype(np.int32)
+        
+        return adjusted
+    
+    @property
+    def arc_count(self) -> int:
+        """
+        Number of directed arcs (traversable edge directions)
+        
+        A two-way edge is one entry in self.edges but two arcs. This is the
+        number len(self.edges) reported before two-way edges were stored once.
+        """
+        self.ensure_csr()
+        return len(self.indices)
+    
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Get graph statistics, including up-to-date degree counts
+        
+        edge_count counts road segments (two-way edges once); arc_count
+        counts directed arcs.
+        """
+        self._update_stats()
+        self._recompute_degree_stats()
+        self.stats['arc_count'] = len(self.indices)
+        return self.stats.copy()
     
     def validate_graph(self) -> Dict[str, any]:
         """
@@ -206,16 +856,17 @@ class Graph:
         Returns:
             Dictionary with validation results
         """
+        self._recompute_degree_stats()
         issues = []
         isolated_nodes = []
         
         for node_id, node in self.nodes.items():
             # Check for isolated nodes
-            if len(node.neighbors) == 0:
+            if node.degree == 0:
                 isolated_nodes.append(node_id)
             
             # Validate neighbor consistency
-            for neighbor, weight in node.neighbors:
+            for neighbor, weight in node.iter_neighbors():
                 if neighbor.id not in self.nodes:
                     issues.append(f"Node {node_id} has neighbor {neighbor.id} not in graph")
         
@@ -225,108 +876,250 @@ class Graph:
             'isolated_nodes': isolated_nodes,
             'total_nodes': len(self.nodes),
             'total_edges': len(self.edges),
+            'total_arcs': self.arc_count,
             'connected_components': self._count_connected_components()
         }
     
     def save_to_file(self, filename: str) -> None:
         """
-        Save graph to pickle file
-        FIXED: Handles large graphs by breaking circular references
+        Save graph as a numpy archive
+        
+        Node coordinates and adjacency are flat arrays, edges one record
+        array; tags, names and stats go into a single JSON blob, indexed by
+        small int arrays so untagged nodes/edges cost nothing.
+        The file is written to filename as-is, whatever its extension.
         """
-        # Save original recursion limit
-        old_limit = sys.getrecursionlimit()
+        # Rebuilds if any node's neighbors changed, so indptr/nbr and the
+        # weights below are read from the same neighbor lists
+        self.ensure_csr()
         
-        try:
-            # Increase recursion limit for large graphs
-            sys.setrecursionlimit(50000)
-            
-            # Prepare data with reduced circular references
-            # Store neighbors as ID lists instead of Node references
-            nodes_data = {}
-            for node_id, node in self.nodes.items():
-                # Create a lightweight copy without neighbor references
-                nodes_data[node_id] = {
-                    'id': node.id,
-                    'latitude': node.latitude,
-                    'longitude': node.longitude,
-                    'tags': node.tags,
-                    'neighbor_ids': [(n.id, w) for n, w in node.neighbors]
-                }
-            
-            with open(filename, 'wb') as f:
-                pickle.dump({
-                    'nodes_data': nodes_data,
-                    'edges': self.edges,
-                    'stats': self.stats,
-                    'version': '2.0'  # Mark as new format
-                }, f, protocol=pickle.HIGHEST_PROTOCOL)
-            
-            logger.info(f"Graph saved to {filename}")
-            
-        finally:
-            # Restore original limit
-            sys.setrecursionlimit(old_limit)
+        # Neighbor weights are kept at full precision next to the CSR arrays,
+        # skipping neighbors outside the graph exactly as build_csr does
+        id_to_idx = self.id_to_idx
+        neighbor_weights = np.fromiter(
+            (w for node in self.nodes.values() for neighbor, w in node.iter_neighbors()
+             if neighbor.id in id_to_idx),
+            dtype=np.float64, count=len(self.indices)
+        )
+        
+        edges = list(self.edges.values())
+        edge_records = np.fromiter(
+            ((e.from_node_id, e.to_node_id, e.weight, _ROAD_TYPE_CODES[e.road_type],
+              np.nan if e.max_speed is None else e.max_speed, e.bidirectional)
+             for e in edges),
+            dtype=_EDGE_DTYPE, count=len(edges)
+        )
+        
+        node_tag_idx = [i for i, node in enumerate(self.nodes.values()) if node.tags]
+        edge_tag_idx = [i for i, edge in enumerate(edges) if edge.tags]
+        edge_name_idx = [i for i, edge in enumerate(edges) if edge.name is not None]
+        node_list = list(self.nodes.values())
+        meta = {
+            'version': GRAPH_FORMAT_VERSION,
+            'node_tags': [node_list[i].tags for i in node_tag_idx],
+            'edge_tags': [edges[i].tags for i in edge_tag_idx],
+            'edge_names': [edges[i].name for i in edge_name_idx],
+            'stats': self.get_statistics()
+        }
+        
+        with open(filename, 'wb') as f:
+            np.savez_compressed(
+                f,
+                ids=self.idx_to_id,
+                **_encode_coordinates(self.node_lat, self.node_lon),
+                indptr=self.indptr,
+                nbr=self.indices,
+                w=neighbor_weights,
+                edges=edge_records,
+                node_tag_idx=np.array(node_tag_idx, dtype=np.int64),
+                edge_tag_idx=np.array(edge_tag_idx, dtype=np.int64),
+                edge_name_idx=np.array(edge_name_idx, dtype=np.int64),
+                meta=np.frombuffer(orjson.dumps(meta), dtype=np.uint8)
+            )
+        
+        logger.info(f"Graph saved to {filename}")
     
     def load_from_file(self, filename: str) -> None:
         """
-        Load graph from pickle file
-        FIXED: Handles both old and new format
+        Load graph from file
+        Reads the numpy archive format as well as older pickle files
         """
-        # Save original recursion limit
-        old_limit = sys.getrecursionlimit()
+        with open(filename, 'rb') as f:
+            is_archive = f.read(len(_NPZ_MAGIC)) == _NPZ_MAGIC
+        
+        self._edges_by_type = {}
+        self._base_max_speeds = {}
+        self._scaled_road_types = set()
+        if is_archive:
+            self._load_arrays(filename)
+        else:
+            self._load_pickle(filename)
+            # Rebuild adjacency arrays and spatial index
+            self.build_csr()
+        self._load_kdtree(filename)
+        logger.info(f"Graph loaded from {filename}")
+    
+    def save_kdtree(self, filename: str) -> None:
+        """
+        Save the nearest-node KD-tree next to a saved graph file
+        
+        load_from_file picks it up from <filename>.kdtree.pkl as long as it
+        was built over the same node ids and coordinates, so the tree isn't
+        rebuilt on startup.
+        """
+        if cKDTree is None:
+            return
+        
+        tree = self._get_kdtree()
+        with open(f"{filename}.kdtree.pkl", 'wb') as f:
+            pickle.dump((self._proj_origin, self._node_fingerprint(), tree), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _node_fingerprint(self) -> str:
+        """Digest of node ids and coordinates in array order"""
+        digest = hashlib.blake2b(digest_size=16)
+        for values in (self.idx_to_id, self.node_lat, self.node_lon):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+    
+    def _load_kdtree(self, filename: str) -> None:
+        """
+        Adopt a KD-tree saved by save_kdtree if it matches the loaded nodes
+        
+        Tree indices are node array positions, so a tree saved for any other
+        node set (e.g. an older version of a rewritten graph file) is ignored.
+        """
+        tree_file = f"{filename}.kdtree.pkl"
+        if cKDTree is None or not os.path.exists(tree_file):
+            return
         
         try:
-            # Increase recursion limit
+            with open(tree_file, 'rb') as f:
+                origin, fingerprint, tree = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load KD-tree {tree_file}: {e}")
+            return
+        
+        if fingerprint != self._node_fingerprint():
+            logger.info(f"Ignoring stale KD-tree {tree_file}")
+            return
+        
+        self._proj_origin = origin
+        self.node_xy = tree.data
+        self._proj_version = self.csr_version
+        self._kdtree = tree
+        self._kdtree_version = self.csr_version
+    
+    def _load_arrays(self, filename: str) -> None:
+        """Rebuild nodes and edges from a numpy archive written by save_to_file"""
+        with np.load(filename) as data:
+            arrays = {key: data[key] for key in data.files}
+        meta = orjson.loads(arrays['meta'].tobytes())
+        arrays['lat'], arrays['lon'] = _decode_coordinates(arrays)
+        
+        interned_tags = {}
+        node_tags = dict(zip(arrays['node_tag_idx'].tolist(),
+                             [_intern_tags(tags, interned_tags) for tags in meta['node_tags']]))
+        self.nodes = {}
+        node_list = []
+        for i, (node_id, lat, lon) in enumerate(zip(arrays['ids'].tolist(),
+                                                    arrays['lat'].tolist(),
+                                                    arrays['lon'].tolist())):
+            node = Node(id=node_id, latitude=lat, longitude=lon, tags=node_tags.get(i, {}))
+            node._version = self._adjacency
+            self.nodes[node_id] = node
+            node_list.append(node)
+        
+        indptr = arrays['indptr'].tolist()
+        neighbor_idx = arrays['nbr'].tolist()
+        neighbor_weights = arrays['w'].tolist()
+        for i, node in enumerate(node_list):
+            for k in range(indptr[i], indptr[i + 1]):
+                node.add_neighbor(node_list[neighbor_idx[k]], neighbor_weights[k])
+        
+        edge_tags = dict(zip(arrays['edge_tag_idx'].tolist(),
+                             [_intern_tags(tags, interned_tags) for tags in meta['edge_tags']]))
+        edge_names = dict(zip(arrays['edge_name_idx'].tolist(), meta['edge_names']))
+        self.edges = {}
+        for i, (from_id, to_id, weight, road_type, max_speed, bidirectional) in enumerate(
+                arrays['edges'].tolist()):
+            if math.isnan(max_speed):
+                max_speed = None
+            elif max_speed.is_integer():
+                max_speed = int(max_speed)
+            self.edges[(from_id, to_id)] = Edge(
+                from_node_id=from_id,
+                to_node_id=to_id,
+                weight=weight,
+                road_type=_ROAD_TYPES[road_type],
+                max_speed=max_speed,
+                tags=edge_tags.get(i, {}),
+                bidirectional=bidirectional,
+                name=edge_names.get(i)
+            )
+        
+        self.stats = meta.get('stats', {})
+        
+        # The archive already holds the CSR arrays build_csr would produce
+        self.id_to_idx = {node_id: i for i, node_id in enumerate(self.nodes)}
+        self.idx_to_id = arrays['ids'].astype(np.int64, copy=False)
+        self.indptr = arrays['indptr'].astype(np.int32, copy=False)
+        self.indices = arrays['nbr'].astype(np.int32, copy=False)
+        self.weights = arrays['w'].astype(np.float32)
+        self.node_lat = arrays['lat'].astype(np.float64, copy=False)
+        self.node_lon = arrays['lon'].astype(np.float64, copy=False)
+        self._rebuild_edge_attributes()
+        self._rebuild_node_trig()
+        self._rebuild_spatial_index()
+        self._mark_csr_fresh()
+    
+    def _load_pickle(self, filename: str) -> None:
+        """Load a graph pickled by older versions (formats 1.x and 2.0)"""
+        # Old-format pickles hold Node objects that reference each other
+        old_limit = sys.getrecursionlimit()
+        try:
             sys.setrecursionlimit(50000)
-            
             with open(filename, 'rb') as f:
                 data = pickle.load(f)
+        finally:
+            sys.setrecursionlimit(old_limit)
+        
+        # Check if it's the 2.0 format
+        if 'version' in data and data['version'] == '2.0':
+            # 2.0 format: reconstruct nodes with neighbor references
+            nodes_data = data['nodes_data']
             
-            # Check if it's the new format
-            if 'version' in data and data['version'] == '2.0':
-                # New format: reconstruct nodes with neighbor references
-                nodes_data = data['nodes_data']
-                
-                # First pass: create all nodes without neighbors
-                self.nodes = {}
-                for node_id, node_data in nodes_data.items():
-                    node = Node(
-                        id=node_data['id'],
-                        latitude=node_data['latitude'],
-                        longitude=node_data['longitude'],
-                        tags=node_data['tags']
-                    )
-                    self.nodes[node_id] = node
-                
-                # Second pass: restore neighbor relationships
-                for node_id, node_data in nodes_data.items():
-                    node = self.nodes[node_id]
-                    for neighbor_id, weight in node_data['neighbor_ids']:
-                        if neighbor_id in self.nodes:
-                            neighbor = self.nodes[neighbor_id]
-                            node.neighbors.append((neighbor, weight))
-                
-                self.edges = data['edges']
-                self.stats = data.get('stats', {})
-                
-            else:
-                # Old format: direct load
-                self.nodes = data['nodes']
-                self.edges = data['edges']
-                self.stats = data.get('stats', {})
+            # First pass: create all nodes without neighbors
+            self.nodes = {}
+            for node_id, node_data in nodes_data.items():
+                node = Node(
+                    id=node_data['id'],
+                    latitude=node_data['latitude'],
+                    longitude=node_data['longitude'],
+                    tags=node_data['tags']
+                )
+                self.nodes[node_id] = node
             
-            # Rebuild spatial index
-            self._rebuild_spatial_index()
-            logger.info(f"Graph loaded from {filename}")
+            # Second pass: restore neighbor relationships
+            for node_id, node_data in nodes_data.items():
+                node = self.nodes[node_id]
+                for neighbor_id, weight in node_data['neighbor_ids']:
+                    if neighbor_id in self.nodes:
+                        neighbor = self.nodes[neighbor_id]
+                        node.add_neighbor(neighbor, weight)
             
-        finally:
-            # Restore original limit
-            sys.setrecursionlimit(old_limit)
-    
-    def _add_to_spatial_index(self, node: Node) -> None:
-        """Add node to spatial index"""
-        grid_key = self._get_grid_key(node.latitude, node.longitude)
-        self._spatial_index[grid_key].add(node.id)
+            self.edges = data['edges']
+            self.stats = data.get('stats', {})
+            
+        else:
+            # Old format: direct load
+            self.nodes = data['nodes']
+            self.edges = data['edges']
+            self.stats = data.get('stats', {})
+            
+            # Nodes pickled before the neighbor dict carry a plain list
+            for node in self.nodes.values():
+                node.restore_neighbors()
     
     def _get_grid_key(self, lat: float, lon: float) -> Tuple[int, int]:
         """Get grid cell key for coordinates"""
@@ -334,37 +1127,22 @@ class Graph:
         grid_lon = int(lon / self._grid_size)
         return (grid_lat, grid_lon)
     
-    def _rebuild_spatial_index(self) -> None:
-        """Rebuild spatial index from scratch"""
-        self._spatial_index.clear()
-        for node in self.nodes.values():
-            self._add_to_spatial_index(node)
-    
     def _update_stats(self) -> None:
-        """Update graph statistics"""
+        """Update node/edge counters (degree stats are computed lazily)"""
         self.stats['node_count'] = len(self.nodes)
         self.stats['edge_count'] = len(self.edges)
-        self.stats['intersection_count'] = sum(1 for node in self.nodes.values() if node.is_intersection())
-        self.stats['dead_end_count'] = sum(1 for node in self.nodes.values() if node.is_dead_end())
+    
+    def _recompute_degree_stats(self) -> None:
+        """Recompute intersection/dead-end counts from CSR degrees"""
+        self.ensure_csr()
+        degrees = np.diff(self.indptr)
+        self.stats['intersection_count'] = int((degrees > 2).sum())
+        self.stats['dead_end_count'] = int((degrees == 1).sum())
     
     def _count_connected_components(self) -> int:
         """Count number of connected components in graph"""
-        visited = set()
-        components = 0
-        
-        for node_id in self.nodes:
-            if node_id not in visited:
-                # DFS to mark all connected nodes
-                stack = [node_id]
-                while stack:
-                    current = stack.pop()
-                    if current not in visited:
-                        visited.add(current)
-                        neighbors = [n.id for n, _ in self.get_neighbors(current)]
-                        stack.extend(neighbors)
-                components += 1
-        
-        return components
+        self.ensure_csr()
+        return int(_cc_count(self.indptr, self.indices))
     
     def __len__(self) -> int:
         return len(self.nodes)
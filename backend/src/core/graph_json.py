@@ -2,12 +2,21 @@
 JSON-based graph storage (alternative to pickle)
 """
 
-import json
+import gzip
 import logging
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _compressed_path(filename: str) -> str:
+    """File save_graph_json writes for filename: the name with .gz appended once"""
+    return filename if filename.endswith('.gz') else filename + '.gz'
+
 
 def save_graph_json(graph, filename: str):
     """Save graph to JSON file"""
@@ -20,7 +29,7 @@ def save_graph_json(graph, filename: str):
             'lat': node.latitude,
             'lon': node.longitude,
             'tags': node.tags,
-            'neighbors': [(n.id, w) for n, w in node.neighbors]
+            'neighbors': [(n.id, w) for n, w in node.iter_neighbors()]
         })
     
     # Convert edges to JSON format
@@ -39,22 +48,14 @@ def save_graph_json(graph, filename: str):
     data = {
         'nodes': nodes_data,
         'edges': edges_data,
-        'stats': graph.stats
+        'stats': graph.get_statistics()
     }
     
-    # Save with compression if file is large
-    json_str = json.dumps(data)
-    
-    if len(json_str) > 10_000_000:  # If > 10MB, compress
-        import gzip
-        filename_gz = filename.replace('.json', '.json.gz')
-        with gzip.open(filename_gz, 'wt', encoding='utf-8') as f:
-            json.dump(data, f, indent=None, separators=(',', ':'))
-        logger.info(f"Graph saved to {filename_gz} (compressed)")
-    else:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        logger.info(f"Graph saved to {filename}")
+    # Always compress; level 1 keeps gzip cheap next to serialization
+    filename_gz = _compressed_path(filename)
+    with gzip.open(filename_gz, 'wb', compresslevel=1) as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+    logger.info(f"Graph saved to {filename_gz} (compressed)")
 
 
 def load_graph_json(graph, filename: str):
@@ -62,16 +63,17 @@ def load_graph_json(graph, filename: str):
     from .node import Node
     from .edge import Edge, RoadType
     
-    # Try compressed first
-    filename_gz = filename.replace('.json', '.json.gz')
+    # Prefer the compressed file save_graph_json writes, then filename as
+    # given; either may be gzip or plain JSON, told apart by magic bytes
+    path = _compressed_path(filename)
+    if not Path(path).exists():
+        path = filename
     
-    if Path(filename_gz).exists():
-        import gzip
-        with gzip.open(filename_gz, 'rt', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        with open(filename, 'r') as f:
-            data = json.load(f)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw[:2] == _GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    data = orjson.loads(raw)
     
     # Rebuild nodes
     graph.nodes = {}
@@ -90,7 +92,7 @@ def load_graph_json(graph, filename: str):
         for neighbor_id, weight in node_data['neighbors']:
             if neighbor_id in graph.nodes:
                 neighbor = graph.nodes[neighbor_id]
-                node.neighbors.append((neighbor, weight))
+                node.add_neighbor(neighbor, weight)
     
     # Rebuild edges
     graph.edges = {}
@@ -107,6 +109,6 @@ def load_graph_json(graph, filename: str):
         graph.edges[(edge.from_node_id, edge.to_node_id)] = edge
     
     graph.stats = data.get('stats', {})
-    graph._rebuild_spatial_index()
+    graph.build_csr()
     
-    logger.info(f"Graph loaded from {filename}")
\ No newline at end of file
+    logger.info(f"Graph loaded from {path}")
\ No newline at end of file
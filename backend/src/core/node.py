@@ -4,11 +4,26 @@ Each node has coordinates and can store additional properties
 """
 
 import math
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple, Optional, ValuesView
+from dataclasses import field
 
+from ..utils.slots import slotted_dataclass
 
-@dataclass
+
+class AdjacencyVersion:
+    """
+    Counter of neighbor changes, shared by a graph and the nodes it holds
+    
+    The graph compares it with the value seen at its last CSR build to tell
+    whether node edits made its arrays stale (see Graph.ensure_csr).
+    """
+    __slots__ = ('value',)
+    
+    def __init__(self) -> None:
+        self.value = 0
+
+
+@slotted_dataclass
 class Node:
     """
     Represents a node (intersection/point) in the road network
@@ -17,15 +32,23 @@ class Node:
         id: Unique identifier (can be OSM node ID or auto-generated)
         latitude: Latitude coordinate (WGS84)
         longitude: Longitude coordinate (WGS84)
-        tags: Additional properties from OSM or custom data
-        neighbors: List of connected nodes with edge weights
+        tags: Additional properties from OSM or custom data (may be shared
+            between nodes; treat as read-only)
+        neighbors: List of connected nodes with edge weights (backed by a
+            dict keyed by neighbor ID)
+    
+    Neighbor changes bump the AdjacencyVersion of the graph that last added
+    the node or built its CSR arrays from it.
     """
     
     id: int
     latitude: float
     longitude: float
     tags: Dict[str, str] = field(default_factory=dict)
-    neighbors: List[Tuple['Node', float]] = field(default_factory=list, repr=False)
+    _nbr: Dict[int, Tuple['Node', float]] = field(default_factory=dict, init=False,
+                                                  repr=False, compare=False)
+    _version: Optional[AdjacencyVersion] = field(default=None, init=False,
+                                                 repr=False, compare=False)
     
     def __post_init__(self):
         """Validate coordinates after initialization"""
@@ -34,6 +57,30 @@ class Node:
         if not (-180 <= self.longitude <= 180):
             raise ValueError(f"Invalid longitude: {self.longitude}. Must be between -180 and 180")
     
+    def __getstate__(self) -> Dict:
+        """Pickle the node without its graph's change counter"""
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_version'}
+    
+    def __setstate__(self, state) -> None:
+        """Restore pickled nodes, including ones saved with a neighbors list"""
+        object.__setattr__(self, '_version', None)
+        if isinstance(state, tuple):
+            # (__dict__ state, slot state) as pickled from a slotted instance
+            state = {**(state[0] or {}), **state[1]}
+        state = dict(state)
+        
+        # Older pickles store a plain neighbors list whose nodes may not be
+        # restored yet; keep the list as-is until restore_neighbors() runs
+        if 'neighbors' in state:
+            state['_nbr'] = state.pop('neighbors')
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+    
+    def restore_neighbors(self) -> None:
+        """Finish unpickling a node saved with a neighbors list"""
+        if isinstance(self._nbr, list):
+            self.neighbors = self._nbr
+    
     def add_neighbor(self, neighbor: 'Node', weight: float) -> None:
         """
         Add a neighboring node with edge weight
@@ -45,12 +92,11 @@ class Node:
         if weight < 0:
             raise ValueError("Edge weight cannot be negative")
         
-        # Avoid duplicate neighbors
-        for existing_neighbor, _ in self.neighbors:
-            if existing_neighbor.id == neighbor.id:
-                return
-        
-        self.neighbors.append((neighbor, weight))
+        # Avoid duplicate neighbors (first weight wins)
+        if neighbor.id not in self._nbr:
+            self._nbr[neighbor.id] = (neighbor, weight)
+            if self._version is not None:
+                self._version.value += 1
     
     def remove_neighbor(self, neighbor_id: int) -> bool:
         """
@@ -62,9 +108,11 @@ class Node:
         Returns:
             True if neighbor was found and removed, False otherwise
         """
-        original_length = len(self.neighbors)
-        self.neighbors = [(n, w) for n, w in self.neighbors if n.id != neighbor_id]
-        return len(self.neighbors) < original_length
+        if self._nbr.pop(neighbor_id, None) is None:
+            return False
+        if self._version is not None:
+            self._version.value += 1
+        return True
     
     def get_neighbor_weight(self, neighbor_id: int) -> Optional[float]:
         """
@@ -76,10 +124,30 @@ class Node:
         Returns:
             Edge weight or None if neighbor not found
         """
-        for neighbor, weight in self.neighbors:
-            if neighbor.id == neighbor_id:
-                return weight
-        return None
+        entry = self._nbr.get(neighbor_id)
+        return entry[1] if entry else None
+    
+    @property
+    def neighbors(self) -> List[Tuple['Node', float]]:
+        """List of (neighbor_node, edge_weight) tuples"""
+        return list(self._nbr.values())
+    
+    @neighbors.setter
+    def neighbors(self, value: Iterable[Tuple['Node', float]]) -> None:
+        self._nbr = {}
+        for neighbor, weight in value:
+            self._nbr.setdefault(neighbor.id, (neighbor, weight))
+        if self._version is not None:
+            self._version.value += 1
+    
+    def iter_neighbors(self) -> ValuesView[Tuple['Node', float]]:
+        """Iterate (neighbor_node, edge_weight) tuples without building a list"""
+        return self._nbr.values()
+    
+    @property
+    def degree(self) -> int:
+        """Number of neighbors"""
+        return len(self._nbr)
     
     def distance_to(self, other: 'Node') -> float:
         """
@@ -103,11 +171,11 @@ class Node:
     
     def is_intersection(self) -> bool:
         """Check if this node is an intersection (has multiple neighbors)"""
-        return len(self.neighbors) > 2
+        return len(self._nbr) > 2
     
     def is_dead_end(self) -> bool:
         """Check if this node is a dead end (has only one neighbor)"""
-        return len(self.neighbors) == 1
+        return len(self._nbr) == 1
     
     def __str__(self) -> str:
         return f"Node({self.id}, {self.latitude:.6f}, {self.longitude:.6f})"
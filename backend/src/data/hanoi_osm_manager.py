@@ -8,9 +8,13 @@ COMPLETE VERSION with all methods
 """
 
 import os
+import sys
 import yaml
+import pickle
 import logging
+import numpy as np
 from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from .osm_downloader import OSMDownloader
@@ -18,11 +22,14 @@ from .osm_parser import OSMParser
 from ..core.graph import Graph
 from ..utils.path_utils import (
     get_config_file, get_hanoi_maps_dir, 
-    get_processed_dir, get_osm_file, get_graph_file
+    get_processed_dir, get_cache_dir
 )
 
 logger = logging.getLogger(__name__)
 
+# libyaml's C loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class HanoiOSMManager:
     """
@@ -32,22 +39,63 @@ class HanoiOSMManager:
     
     def __init__(self):
         """Initialize Hanoi OSM manager"""
+        # Resolve directories once; per-file paths are built from these
+        self._maps_path = get_hanoi_maps_dir()
+        self._processed_path = get_processed_dir()
+        self._cache_path = get_cache_dir()
+        
         self.config_path = str(get_config_file("hanoi_config.yaml"))
         self.config = self._load_config()
+        self._all_pois: Optional[List[Dict]] = None
         self.downloader = OSMDownloader()
-        self.data_dir = str(get_hanoi_maps_dir())
-        self.processed_dir = str(get_processed_dir())
+        self.data_dir = str(self._maps_path)
+        self.processed_dir = str(self._processed_path)
         
         logger.info(f"HanoiOSMManager initialized")
         logger.info(f"  Config: {self.config_path}")
         logger.info(f"  Maps dir: {self.data_dir}")
         logger.info(f"  Processed dir: {self.processed_dir}")
     
+    def _osm_file(self, area: str) -> str:
+        """Path of an area's OSM file (same layout as path_utils.get_osm_file)"""
+        return str(self._maps_path / f"{area}.osm")
+    
+    def _graph_file(self, name: str) -> str:
+        """Path of a saved graph (same layout as path_utils.get_graph_file)"""
+        return str(self._processed_path / f"{name}.pkl")
+    
     def _load_config(self) -> Dict:
-        """Load Hanoi configuration"""
+        """
+        Load Hanoi configuration
+        
+        The parsed YAML is cached as a pickle in the cache directory and
+        reused while the YAML file's mtime and size are unchanged.
+        """
         try:
+            stat = os.stat(self.config_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            cache_file = self._cache_path / f"{os.path.basename(self.config_path)}.pkl"
+            
+            try:
+                with open(cache_file, 'rb') as f:
+                    cached_signature, config = pickle.load(f)
+                if cached_signature == signature:
+                    return self._intern_config_keys(config)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+                pass
+            
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                config = yaml.load(f, Loader=_YAML_LOADER)
+            
+            try:
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump((signature, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                logger.debug(f"Could not cache config: {e}")
+            
+            return self._intern_config_keys(config)
         except FileNotFoundError:
             logger.warning(f"Config file not found: {self.config_path}")
             logger.info("Using default configuration")
@@ -56,6 +104,20 @@ class HanoiOSMManager:
             logger.error(f"Error loading config: {e}")
             return self._get_default_config()
     
+    @staticmethod
+    def _intern_config_keys(config: Dict) -> Dict:
+        """Intern district keys and road type names used for lookups"""
+        if not config:
+            return config
+        
+        for section in (config.get('districts'),
+                        config.get('routing', {}).get('speed_adjustments')):
+            if isinstance(section, dict):
+                items = list(section.items())
+                section.clear()
+                section.update((sys.intern(key), value) for key, value in items)
+        return config
+    
     def _get_default_config(self) -> Dict:
         """Get default Hanoi configuration"""
         return {
@@ -103,7 +165,7 @@ class HanoiOSMManager:
         district = districts[district_key]
         bbox = tuple(district['bbox'])
         
-        output_file = str(get_osm_file(district_key))
+        output_file = self._osm_file(district_key)
         
         logger.info(f"📥 Downloading {district['name']} district...")
         logger.info(f"   Output: {output_file}")
@@ -117,6 +179,42 @@ class HanoiOSMManager:
             logger.error(f"❌ Failed to download {district['name']}")
             return None
     
+    def download_and_parse_district(self, district_key: str, save_osm: bool = False,
+                                    graph: Optional[Graph] = None) -> Optional[Graph]:
+        """
+        Download a district and parse it while the response streams in
+        
+        Args:
+            district_key: District key from config (e.g., 'hoan_kiem')
+            save_osm: Also keep the raw .osm file on disk
+            graph: Existing graph to add the district to (default: new graph)
+            
+        Returns:
+            Graph containing the district, or None if the download failed
+        """
+        districts = self.config.get('districts', {})
+        
+        if district_key not in districts:
+            logger.error(f"District '{district_key}' not found")
+            logger.info(f"Available districts: {', '.join(districts.keys())}")
+            return None
+        
+        district = districts[district_key]
+        save_to = self._osm_file(district_key) if save_osm else None
+        
+        logger.info(f"📥 Downloading and parsing {district['name']} district...")
+        
+        stream = self.downloader.open_bbox_stream(tuple(district['bbox']), save_to=save_to)
+        if stream is None:
+            logger.error(f"❌ Failed to download {district['name']}")
+            return None
+        
+        try:
+            parser = OSMParser(filter_highways=True, graph=graph)
+            return parser.parse_osm_file(stream)
+        finally:
+            stream.close()
+    
     def download_all_districts(self, priority: Optional[int] = None) -> List[str]:
         """
         Download OSM data for all Hanoi districts
@@ -132,20 +230,43 @@ class HanoiOSMManager:
         
         logger.info(f"📥 Downloading districts (priority: {priority if priority else 'all'})")
         
-        for district_key, district_data in districts.items():
-            # Filter by priority if specified
-            if priority is not None and district_data.get('priority') != priority:
-                continue
-            
-            logger.info(f"\n{'='*50}")
-            logger.info(f"District: {district_data['name']}")
+        # Filter by priority if specified
+        district_keys = [
+            district_key for district_key, district_data in districts.items()
+            if priority is None or district_data.get('priority') == priority
+        ]
+        
+        # One combined query first; it saves a round of Overpass queueing
+        # per district
+        if len(district_keys) > 1:
+            output_files = [self._osm_file(district_key) for district_key in district_keys]
+            if self.downloader.download_many(
+                    [tuple(districts[district_key]['bbox']) for district_key in district_keys],
+                    output_files):
+                logger.info(f"✅ Downloaded {len(output_files)} district(s)")
+                return output_files
+            logger.warning("Combined download failed, downloading districts one by one")
+        
+        # Downloads wait on Overpass, so run a couple at once (it grants
+        # two query slots per client)
+        max_workers = int(os.getenv('OSM_PARALLEL', '2'))
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self.download_district, district_key): district_key
+                for district_key in district_keys
+            }
             
-            file_path = self.download_district(district_key)
-            if file_path:
-                downloaded_files.append(file_path)
-                logger.info(f"✅ Success")
-            else:
-                logger.error(f"❌ Failed")
+            for future in as_completed(futures):
+                district_name = districts[futures[future]]['name']
+                logger.info(f"\n{'='*50}")
+                logger.info(f"District: {district_name}")
+                
+                file_path = future.result()
+                if file_path:
+                    downloaded_files.append(file_path)
+                    logger.info(f"✅ Success")
+                else:
+                    logger.error(f"❌ Failed")
         
         logger.info(f"\n{'='*50}")
         logger.info(f"✅ Downloaded {len(downloaded_files)} district(s)")
@@ -154,7 +275,7 @@ class HanoiOSMManager:
     def download_city_center(self) -> Optional[str]:
         """Download focused area around Hanoi city center"""
         center_bbox = (21.0150, 105.8400, 21.0400, 105.8650)
-        output_file = str(get_osm_file("hanoi_center"))
+        output_file = self._osm_file("hanoi_center")
         
         logger.info("📥 Downloading Hanoi city center...")
         logger.info(f"   Area: ~9 km² around Hoan Kiem Lake")
@@ -180,7 +301,8 @@ class HanoiOSMManager:
         Returns:
             Parsed Graph object
         """
-        parser = OSMParser(filter_highways=True)
+        parser = OSMParser(filter_highways=True, cache_dir=str(self._cache_path),
+                           workers=int(os.getenv('OSM_PARSE_WORKERS', '1')))
         
         logger.info(f"🔧 Parsing {osm_file}...")
         graph = parser.parse_osm_file(osm_file)
@@ -189,10 +311,12 @@ class HanoiOSMManager:
         self._apply_hanoi_speeds(graph)
         
         # Save graph with absolute path
-        graph_file = str(get_graph_file(save_name))
+        graph_file = self._graph_file(save_name)
         
         logger.info(f"💾 Saving to {graph_file}...")
         graph.save_to_file(graph_file)
+        self._project_graph(graph)
+        graph.save_kdtree(graph_file)
         
         stats = parser.get_statistics()
         self._print_stats(stats, graph)
@@ -225,35 +349,15 @@ class HanoiOSMManager:
         for i, osm_file in enumerate(osm_files, 1):
             logger.info(f"\n📦 Processing file {i}/{len(osm_files)}: {osm_file}")
             
-            parser = OSMParser(filter_highways=True)
-            temp_graph = parser.parse_osm_file(osm_file)
-            
-            # Merge into main graph
-            logger.info(f"   Merging {len(temp_graph.nodes)} nodes, {len(temp_graph.edges)} edges...")
-            
-            # Add nodes
-            nodes_added = 0
-            for node_id, node in temp_graph.nodes.items():
-                if node_id not in merged_graph.nodes:
-                    from ..core.node import Node
-                    new_node = Node(
-                        id=node.id,
-                        latitude=node.latitude,
-                        longitude=node.longitude,
-                        tags=node.tags.copy()
-                    )
-                    merged_graph.add_node(new_node)
-                    nodes_added += 1
-            
-            # Add edges
-            edges_added = 0
-            for edge_key, edge in temp_graph.edges.items():
-                if edge_key not in merged_graph.edges:
-                    if edge.from_node_id in merged_graph.nodes and edge.to_node_id in merged_graph.nodes:
-                        merged_graph.add_edge(edge)
-                        edges_added += 1
+            # Parse straight into the merged graph; nodes and edges shared
+            # with earlier files are reused rather than copied
+            nodes_before = len(merged_graph.nodes)
+            edges_before = len(merged_graph.edges)
+            parser = OSMParser(filter_highways=True, graph=merged_graph)
+            parser.parse_osm_file(osm_file)
             
-            logger.info(f"   ✅ Added {nodes_added} nodes, {edges_added} edges")
+            logger.info(f"   ✅ Added {len(merged_graph.nodes) - nodes_before} nodes, "
+                        f"{len(merged_graph.edges) - edges_before} edges")
             
             stats = parser.get_statistics()
             for key in total_stats:
@@ -268,9 +372,11 @@ class HanoiOSMManager:
         total_stats['graph_edges'] = len(merged_graph.edges)
         
         # Save graph
-        graph_file = str(get_graph_file(save_name))
+        graph_file = self._graph_file(save_name)
         logger.info(f"\n💾 Saving merged graph to {graph_file}...")
         merged_graph.save_to_file(graph_file)
+        self._project_graph(merged_graph)
+        merged_graph.save_kdtree(graph_file)
         
         self._print_stats(total_stats, merged_graph)
         
@@ -285,40 +391,38 @@ class HanoiOSMManager:
             return
         
         logger.info("⚙️  Applying Hanoi traffic speed adjustments...")
-        adjusted_count = 0
-        
-        for edge in graph.edges.values():
-            road_type_str = edge.road_type.value
-            adjustment = speed_adjustments.get(road_type_str, 1.0)
-            
-            if adjustment != 1.0:
-                edge.max_speed = int(edge.max_speed * adjustment)
-                adjusted_count += 1
+        adjusted_count = graph.scale_max_speeds(speed_adjustments)
         
         logger.info(f"   Adjusted {adjusted_count} edges")
     
     def _print_stats(self, stats: Dict, graph: Graph) -> None:
-        """Print statistics"""
-        print("\n" + "="*60)
-        print("📊 HANOI MAP STATISTICS")
-        print("="*60)
-        print(f"🗺️  Area: {self.config['city']['name']}, Vietnam")
-        print(f"\n📈 Data Statistics:")
-        print(f"   Total OSM nodes: {stats.get('total_nodes', 0):,}")
-        print(f"   Total OSM ways: {stats.get('total_ways', 0):,}")
-        print(f"   Included ways: {stats.get('included_ways', 0):,}")
-        print(f"   Graph nodes: {len(graph.nodes):,}")
-        print(f"   Graph edges: {len(graph.edges):,}")
-        print(f"   Intersections: {graph.stats.get('intersection_count', 0):,}")
-        
-        # Validate
+        """Print statistics (as one write, so the block is not interleaved)"""
         validation = graph.validate_graph()
-        print(f"\n🔍 Validation:")
-        print(f"   Connected components: {validation['connected_components']}")
+        
+        lines = [
+            "",
+            "="*60,
+            "📊 HANOI MAP STATISTICS",
+            "="*60,
+            f"🗺️  Area: {self.config['city']['name']}, Vietnam",
+            "",
+            "📈 Data Statistics:",
+            f"   Total OSM nodes: {stats.get('total_nodes', 0):,}",
+            f"   Total OSM ways: {stats.get('total_ways', 0):,}",
+            f"   Included ways: {stats.get('included_ways', 0):,}",
+            f"   Graph nodes: {len(graph.nodes):,}",
+            f"   Graph edges: {len(graph.edges):,}",
+            f"   Graph arcs (directed): {graph.arc_count:,}",
+            f"   Intersections: {graph.stats['intersection_count']:,}",
+            "",
+            "🔍 Validation:",
+            f"   Connected components: {validation['connected_components']}",
+        ]
         if validation['connected_components'] > 1:
-            print(f"   ⚠️  Graph has disconnected parts!")
+            lines.append("   ⚠️  Graph has disconnected parts!")
+        lines.append("="*60 + "\n")
         
-        print("="*60 + "\n")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def get_landmarks(self) -> List[Dict]:
         """Get landmarks list"""
@@ -333,47 +437,68 @@ class HanoiOSMManager:
         return self.config.get('hospitals', [])
     
     def get_all_pois(self) -> List[Dict]:
-        """Get all POIs"""
-        pois = []
-        
-        for landmark in self.get_landmarks():
-            pois.append({**landmark, 'type': 'landmark'})
-        
-        for university in self.get_universities():
-            pois.append({**university, 'type': 'university'})
-        
-        for hospital in self.get_hospitals():
-            pois.append({**hospital, 'type': 'hospital'})
+        """
+        Get all POIs, each tagged with its 'type'
         
-        return pois
+        The list is built on first use and shared afterwards; treat it as
+        read-only.
+        """
+        if self._all_pois is None:
+            self._all_pois = [
+                {**poi, 'type': poi_type}
+                for poi_type, pois in (('landmark', self.get_landmarks()),
+                                       ('university', self.get_universities()),
+                                       ('hospital', self.get_hospitals()))
+                for poi in pois
+            ]
+        return self._all_pois
     
     def find_nearest_poi_node(self, graph: Graph, poi: Dict) -> Optional[int]:
         """Find the nearest graph node to a POI"""
-        nearest_node = graph.find_nearest_node(
-            poi['lat'], 
-            poi['lon'], 
+        self._project_graph(graph)
+        node_id = int(graph.find_nearest_nodes(
+            np.array([poi['lat']]),
+            np.array([poi['lon']]),
             max_distance=500
-        )
+        )[0])
         
-        if nearest_node:
-            return nearest_node.id
+        if node_id >= 0:
+            return node_id
         return None
     
+    def _project_graph(self, graph: Graph) -> None:
+        """Centre the graph's local metric frame on the configured city centre"""
+        center = self.config.get('city', {}).get('center', {})
+        graph.project_local(center.get('latitude'), center.get('longitude'))
+    
     def attach_pois_to_graph(self, graph: Graph) -> Dict[str, int]:
         """Attach all POIs to nearest graph nodes"""
-        poi_node_map = {}
         pois = self.get_all_pois()
         
         logger.info(f"🔗 Attaching {len(pois)} POIs to graph nodes...")
         
-        for poi in pois:
-            node_id = self.find_nearest_poi_node(graph, poi)
-            if node_id:
-                poi_name = poi.get('name_en', poi.get('name'))
-                poi_node_map[poi_name] = node_id
-                logger.debug(f"   {poi_name} → Node {node_id}")
-            else:
-                logger.warning(f"   Could not attach POI: {poi.get('name')}")
+        if not pois:
+            logger.info(f"✅ Attached 0/0 POIs")
+            return {}
+        
+        # One batched lookup for all POIs
+        self._project_graph(graph)
+        node_ids = graph.find_nearest_nodes(
+            np.array([poi['lat'] for poi in pois], dtype=np.float64),
+            np.array([poi['lon'] for poi in pois], dtype=np.float64),
+            max_distance=500
+        )
+        
+        poi_node_map = {
+            poi.get('name_en') or poi.get('name'): node_id
+            for poi, node_id in zip(pois, node_ids.tolist())
+            if node_id >= 0
+        }
+        
+        unattached = np.flatnonzero(node_ids < 0)
+        if len(unattached):
+            names = ', '.join(str(pois[i].get('name')) for i in unattached.tolist())
+            logger.warning(f"   Could not attach {len(unattached)} POI(s): {names}")
         
         logger.info(f"✅ Attached {len(poi_node_map)}/{len(pois)} POIs")
         return poi_node_map
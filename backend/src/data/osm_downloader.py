@@ -3,12 +3,41 @@ Download OpenStreetMap data using Overpass API
 """
 
 import requests
+import io
 import logging
-from typing import Tuple, Optional
+import math
+import os
+import re
+import shutil
+import string
+from typing import IO, List, Tuple, Optional
 import time
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 logger = logging.getLogger(__name__)
 
+# "Slot available after: <timestamp>, in N seconds." lines of /api/status
+_SLOT_WAIT_RE = re.compile(r'available after: .*?, in (-?\d+) seconds')
+
+
+class _TeeReader:
+    """Binary file-like wrapper that copies everything read into a sink file"""
+    
+    def __init__(self, source: IO[bytes], sink: IO[bytes]):
+        self._source = source
+        self._sink = sink
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self._sink.write(data)
+        return data
+    
+    def close(self) -> None:
+        self._sink.close()
+        self._source.close()
+
 
 class OSMDownloader:
     """
@@ -18,15 +47,47 @@ class OSMDownloader:
     """
     
     OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+    OVERPASS_STATUS_URL = "https://overpass-api.de/api/status"
     
-    def __init__(self, timeout: int = 180):
+    # Overpass answers these when it is overloaded or rate limiting
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+    
+    def __init__(self, timeout: int = 180, max_retries: int = 5):
         """
         Initialize OSM downloader
         
         Args:
             timeout: Request timeout in seconds
+            max_retries: Retries on HTTP 429/502/503/504, with exponential
+                backoff or as long as the server's Retry-After asks
         """
         self.timeout = timeout
+        self.max_retries = max_retries
+        
+        # Compact Overpass QL (no whitespace to send or parse) with the
+        # timeout baked in once
+        self._query_header = f'[out:xml][timeout:{timeout}];'
+        self._bbox_section = string.Template(
+            '(way["highway"]($min_lat,$min_lon,$max_lat,$max_lon);node(w););'
+            'out body;>;out skel qt;'
+        )
+        self._place_query = string.Template(
+            self._query_header
+            + 'area["name"="$place"]->.searchArea;'
+            '(way["highway"](area.searchArea);node(w););out body;>;out skel qt;'
+        )
+        
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=2,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=['GET', 'POST'],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(max_retries=retry))
+        self.session.mount('http://', HTTPAdapter(max_retries=retry))
     
     def download_by_bbox(self, bbox: Tuple[float, float, float, float],
                         output_file: str) -> bool:
@@ -47,53 +108,140 @@ class OSMDownloader:
             logger.error("Invalid bounding box")
             return False
         
-        # Calculate area size (rough estimate)
+        # Calculate area size (rough estimate); not worth logging below 1 km²
         area_km2 = self._estimate_area(bbox)
-        logger.info(f"Downloading area of approximately {area_km2:.2f} km²")
-        
-        if area_km2 > 100:
-            logger.warning("Large area requested. This may take a while or fail.")
+        if area_km2 >= 1:
+            logger.info(f"Downloading area of approximately {area_km2:.2f} km²")
+            
+            if area_km2 > 100:
+                logger.warning("Large area requested. This may take a while or fail.")
         
         # Build Overpass query
-        query = f"""
-        [out:xml][timeout:{self.timeout}];
-        (
-          way["highway"]({min_lat},{min_lon},{max_lat},{max_lon});
-          node(w);
-        );
-        out body;
-        >;
-        out skel qt;
-        """
+        query = self._build_bbox_query(bbox)
         
         logger.info(f"Downloading OSM data for bbox: {bbox}")
         
         try:
             # Make request
-            response = requests.post(
-                self.OVERPASS_URL,
-                data={'data': query},
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                # Save to file
-                with open(output_file, 'wb') as f:
-                    f.write(response.content)
+            with self._post(query, stream=True) as response:
+                if response.status_code == 200:
+                    self._save_response(response, output_file)
+                    return True
+                else:
+                    logger.error(f"Download failed with status {response.status_code}")
+                    return False
                 
-                file_size_mb = len(response.content) / (1024 * 1024)
-                logger.info(f"Downloaded {file_size_mb:.2f} MB to {output_file}")
-                return True
-            else:
+        except requests.Timeout:
+            logger.error("Request timed out. Try a smaller area.")
+            return False
+        except Exception as e:
+            logger.error(f"Download error: {e}")
+            return False
+    
+    def open_bbox_stream(self, bbox: Tuple[float, float, float, float],
+                         save_to: Optional[str] = None) -> Optional[IO[bytes]]:
+        """
+        Open the OSM XML for a bounding box as a stream, without buffering it
+        
+        The stream can be handed straight to OSMParser.parse_osm_file so
+        parsing proceeds while the response is still arriving.
+        
+        Args:
+            bbox: (min_lat, min_lon, max_lat, max_lon)
+            save_to: Optional path to also write the raw XML to as it is read
+            
+        Returns:
+            Binary file-like object (close it when done), or None on failure
+        """
+        if not self._validate_bbox(bbox):
+            logger.error("Invalid bounding box")
+            return None
+        
+        logger.info(f"Streaming OSM data for bbox: {bbox}")
+        
+        try:
+            response = self._post(self._build_bbox_query(bbox), stream=True)
+            
+            if response.status_code != 200:
                 logger.error(f"Download failed with status {response.status_code}")
-                return False
-                
+                response.close()
+                return None
+            
+            # Undo any Content-Encoding (gzip) transparently while reading
+            response.raw.decode_content = True
+            if save_to:
+                return _TeeReader(response.raw, open(save_to, 'wb'))
+            return response.raw
+            
         except requests.Timeout:
             logger.error("Request timed out. Try a smaller area.")
+            return None
+        except Exception as e:
+            logger.error(f"Download error: {e}")
+            return None
+    
+    def download_many(self, bboxes: List[Tuple[float, float, float, float]],
+                      output_files: List[str]) -> bool:
+        """
+        Download several bounding boxes with a single Overpass query
+        
+        Saves the Overpass queue wait and query setup of one request per
+        bbox. Each bbox's output is followed by an `out count;` marker, which
+        is where the response is split into the per-bbox files.
+        
+        Args:
+            bboxes: List of (min_lat, min_lon, max_lat, max_lon)
+            output_files: Path to save each bbox's OSM XML file to
+            
+        Returns:
+            True if every file was written, False otherwise
+        """
+        if len(bboxes) != len(output_files):
+            raise ValueError("Need one output file per bounding box")
+        
+        if not all(self._validate_bbox(bbox) for bbox in bboxes):
+            logger.error("Invalid bounding box")
+            return False
+        
+        query = self._build_bbox_query(*bboxes)
+        
+        logger.info(f"Downloading OSM data for {len(bboxes)} bboxes in one query")
+        
+        # Parts go to temporary files and only replace the outputs once the
+        # whole response split cleanly, so a truncated response never leaves
+        # one bbox's data (or nothing) under another's name
+        tmp_files = [f"{output_file}.{os.getpid()}.tmp" for output_file in output_files]
+        try:
+            with self._post(query, stream=True) as response:
+                if response.status_code != 200:
+                    logger.error(f"Download failed with status {response.status_code}")
+                    return False
+                
+                # Buffered line reads need the raw stream to stay open at EOF
+                response.raw.decode_content = True
+                response.raw.auto_close = False
+                parts = self._split_response(io.BufferedReader(response.raw), tmp_files)
+            
+            if parts != len(output_files):
+                logger.error(f"Expected {len(output_files)} parts in the response, got {parts}")
+                return False
+            
+            for tmp_file, output_file in zip(tmp_files, output_files):
+                os.replace(tmp_file, output_file)
+                file_size_mb = os.path.getsize(output_file) / (1024 * 1024)
+                logger.info(f"Downloaded {file_size_mb:.2f} MB to {output_file}")
+            return True
+            
+        except requests.Timeout:
+            logger.error("Request timed out. Try fewer or smaller areas.")
             return False
         except Exception as e:
             logger.error(f"Download error: {e}")
             return False
+        finally:
+            for tmp_file in tmp_files:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
     
     def download_by_place(self, place_name: str, output_file: str) -> bool:
         """
@@ -109,61 +257,144 @@ class OSMDownloader:
         # First, we need to geocode the place name to get its boundaries
         # This is a simplified version - in production, use Nominatim API
         
-        query = f"""
-        [out:xml][timeout:{self.timeout}];
-        area["name"="{place_name}"]->.searchArea;
-        (
-          way["highway"](area.searchArea);
-          node(w);
-        );
-        out body;
-        >;
-        out skel qt;
-        """
+        query = self._place_query.substitute(place=place_name)
         
         logger.info(f"Downloading OSM data for place: {place_name}")
         
         try:
-            response = requests.post(
-                self.OVERPASS_URL,
-                data={'data': query},
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                with open(output_file, 'wb') as f:
-                    f.write(response.content)
-                
-                file_size_mb = len(response.content) / (1024 * 1024)
-                logger.info(f"Downloaded {file_size_mb:.2f} MB to {output_file}")
-                return True
-            else:
-                logger.error(f"Download failed with status {response.status_code}")
-                return False
+            with self._post(query, stream=True) as response:
+                if response.status_code == 200:
+                    self._save_response(response, output_file)
+                    return True
+                else:
+                    logger.error(f"Download failed with status {response.status_code}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Download error: {e}")
             return False
     
+    def _save_response(self, response: requests.Response, output_file: str) -> None:
+        """Stream a response body to disk, undoing any gzip transfer encoding"""
+        response.raw.decode_content = True
+        with open(output_file, 'wb') as f:
+            shutil.copyfileobj(response.raw, f, length=1 << 20)
+        
+        file_size_mb = os.path.getsize(output_file) / (1024 * 1024)
+        logger.info(f"Downloaded {file_size_mb:.2f} MB to {output_file}")
+    
+    def _post(self, query: str, stream: bool = False) -> requests.Response:
+        """POST an Overpass query once a slot is free; the session retries 429/50x"""
+        self._wait_for_slot()
+        # Overpass XML compresses about 10x on the wire
+        return self.session.post(
+            self.OVERPASS_URL,
+            data={'data': query},
+            headers={'Accept-Encoding': 'gzip'},
+            timeout=self.timeout,
+            stream=stream
+        )
+    
+    def _wait_for_slot(self) -> None:
+        """Sleep until Overpass reports a free query slot for this client"""
+        try:
+            status = self.session.get(self.OVERPASS_STATUS_URL, timeout=10).text
+        except requests.RequestException as e:
+            logger.debug(f"Could not read Overpass status: {e}")
+            return
+        
+        if re.search(r'^[1-9]\d* slots? available now', status, re.MULTILINE):
+            return
+        
+        waits = [int(w) for w in _SLOT_WAIT_RE.findall(status)]
+        if waits and min(waits) > 0:
+            delay = min(min(waits), self.timeout)
+            logger.info(f"No free Overpass slot, waiting {delay}s")
+            time.sleep(delay)
+    
+    def _split_response(self, source: IO[bytes], output_files: List[str]) -> int:
+        """
+        Write a multi-bbox response to one file per `out count;` section
+        
+        Every file gets the response's XML header (<osm>, <note>, <meta>).
+        
+        Returns:
+            Number of sections written
+        """
+        header = []
+        header_done = False
+        in_count = False
+        part = 0
+        out = None
+        
+        try:
+            for line in source:
+                element = line.lstrip()
+                
+                if not header_done:
+                    if not element or element.startswith((b'<?xml', b'<osm', b'<note', b'<meta')):
+                        header.append(line)
+                        continue
+                    header_done = True
+                
+                if in_count:
+                    in_count = b'</count>' not in element
+                    continue
+                
+                if element.startswith(b'<remark'):
+                    # Overpass reports runtime errors (e.g. timeouts) in-band
+                    raise ValueError(f"Overpass error: {element.decode('utf-8', 'replace').strip()}")
+                
+                if element.startswith(b'<count'):
+                    if part < len(output_files):
+                        if out is None:
+                            out = open(output_files[part], 'wb')
+                            out.writelines(header)
+                        out.write(b'</osm>\n')
+                        out.close()
+                        out = None
+                    part += 1
+                    in_count = not element.rstrip().endswith(b'/>')
+                    continue
+                
+                if element.startswith(b'</osm>') or part >= len(output_files):
+                    continue
+                
+                if out is None:
+                    out = open(output_files[part], 'wb')
+                    out.writelines(header)
+                out.write(line)
+        finally:
+            if out is not None:
+                out.close()
+        
+        return part
+    
+    def _build_bbox_query(self, *bboxes: Tuple[float, float, float, float]) -> str:
+        """
+        Build the Overpass query for all highways in one or more bounding boxes
+        
+        With several bboxes, each one's output ends with an `out count;`
+        marker (see _split_response).
+        """
+        separator = 'out count;' if len(bboxes) > 1 else ''
+        return self._query_header + ''.join(
+            self._bbox_section.substitute(min_lat=min_lat, min_lon=min_lon,
+                                          max_lat=max_lat, max_lon=max_lon) + separator
+            for min_lat, min_lon, max_lat, max_lon in bboxes
+        )
+    
     def _validate_bbox(self, bbox: Tuple[float, float, float, float]) -> bool:
         """Validate bounding box coordinates"""
         min_lat, min_lon, max_lat, max_lon = bbox
-        
-        if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
-            return False
-        if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
-            return False
-        if min_lat >= max_lat or min_lon >= max_lon:
-            return False
-        
-        return True
+        return -90 <= min_lat < max_lat <= 90 and -180 <= min_lon < max_lon <= 180
     
     def _estimate_area(self, bbox: Tuple[float, float, float, float]) -> float:
         """Estimate area of bounding box in km²"""
         min_lat, min_lon, max_lat, max_lon = bbox
         
-        # Rough calculation
+        # Rough calculation; a degree of longitude shrinks with cos(latitude)
         lat_km = abs(max_lat - min_lat) * 111
-        lon_km = abs(max_lon - min_lon) * 111 * abs(min_lat + max_lat) / 2
+        lon_km = abs(max_lon - min_lon) * 111 * math.cos(math.radians((min_lat + max_lat) * 0.5))
         
         return lat_km * lon_km
\ No newline at end of file
@@ -3,17 +3,161 @@ OpenStreetMap XML parser for extracting road networks
 Converts OSM data into our Graph structure
 """
 
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Set, Tuple, Optional
+from typing import IO, Dict, Iterator, List, Set, Tuple, Optional, Union
+import hashlib
 import logging
+import mmap
+import os
+import re
+import sys
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import orjson
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+    _Element = etree._Element
+except ImportError:  # stdlib fallback: same API, slower and no huge_tree
+    import xml.etree.ElementTree as etree
+    LXML_AVAILABLE = False
+    _Element = etree.Element
 
 from ..core.node import Node
 from ..core.edge import Edge, RoadType
-from ..core.graph import Graph
+from ..core.graph import Graph, GRAPH_FORMAT_VERSION
+from ..utils.geo_utils import equirect_vec
 
 logger = logging.getLogger(__name__)
 
+# Tag values that repeat across most ways; interned like the keys so the
+# parsed tag dicts share one copy of each string
+_INTERN_VALUES = frozenset({
+    'yes', 'no', 'true', 'false', '1', '0', '-1', 'reversible',
+    'motorway', 'trunk', 'primary', 'secondary', 'tertiary',
+    'unclassified', 'residential', 'motorway_link', 'trunk_link',
+    'primary_link', 'secondary_link', 'tertiary_link',
+    'living_street', 'service', 'road', 'footway', 'path', 'steps',
+    'cycleway', 'track', 'pedestrian', 'asphalt', 'concrete', 'paved',
+    'unpaved', 'both', 'left', 'right', 'none', 'separate', 'designated'
+})
+
+# Leading number of a maxspeed value, with an optional mph unit
+_MAXSPEED_RE = re.compile(r'\s*(\d+)\s*(mph)?', re.IGNORECASE)
+
+# Start of a top-level <node>, <way> or <relation>; '<' never appears
+# unescaped in attribute values, so this only matches real element starts
+_ELEMENT_START_RE = re.compile(rb'<(?:node|way|relation)[\s/>]')
+
+
+def _read_tags(elem: _Element) -> Dict[str, str]:
+    """Collect an element's <tag> children, interning keys and common values"""
+    tags = {}
+    for tag in elem.iterfind('tag'):
+        value = tag.get('v')
+        if value in _INTERN_VALUES:
+            value = sys.intern(value)
+        tags[sys.intern(tag.get('k'))] = value
+    return tags
+
+
+def _iter_osm_elements(source: Union[str, IO[bytes]]) -> Iterator[_Element]:
+    """
+    Stream the top-level <node> and <way> elements of an OSM XML file
+    
+    Each element is cleared (along with already-processed siblings) once the
+    caller moves on, so memory stays bounded on large extracts.
+    """
+    if LXML_AVAILABLE:
+        # libxml2 filters by tag itself, so only nodes and ways reach Python
+        context = etree.iterparse(source, events=('end',), tag=('node', 'way'),
+                                  huge_tree=True, recover=True)
+        for _, elem in context:
+            yield elem
+            elem.clear(keep_tail=False)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return
+    
+    context = etree.iterparse(source, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag in ('node', 'way'):
+            yield elem
+            root.clear()
+
+
+class _ChunkReader:
+    """Binary reader over bytes [start, end) of a mapped file, wrapped in <osm>"""
+    
+    def __init__(self, mm: mmap.mmap, start: int, end: int):
+        self._mm = mm
+        self._pos = start
+        self._end = end
+        self._pending = b'<osm>'
+        self._suffix = b'</osm>'
+    
+    def read(self, size: int = -1) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending, b''
+            return data
+        if self._pos < self._end:
+            stop = self._end if size < 0 else min(self._end, self._pos + size)
+            data = self._mm[self._pos:stop]
+            self._pos = stop
+            return data
+        data, self._suffix = self._suffix, b''
+        return data
+
+
+def _read_osm_chunk(file_path: str, start: int, end: int, filter_highways: bool) -> Tuple:
+    """
+    Read the nodes and ways in bytes [start, end) of an OSM file (a worker
+    process job for OSMParser._parse_file_parallel)
+    
+    Returns:
+        (node ids, lats, lons, {node position: tags}, [(nodes read before
+        the way, way arguments)], stats), all in file order
+    """
+    parser = OSMParser(filter_highways=filter_highways)
+    node_ids, node_lats, node_lons = array('q'), array('d'), array('d')
+    node_tags: Dict[int, Dict[str, str]] = {}
+    ways = []
+    
+    # The chunk is paged in from the mapping as the XML parser pulls it,
+    # never copied as a whole
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        
+        for elem in _iter_osm_elements(_ChunkReader(mm, start, end)):
+            if elem.tag == 'node':
+                try:
+                    node_id, lat, lon, tags = parser._read_node_element(elem)
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Error parsing node: {e}")
+                    parser.stats['parsing_errors'] += 1
+                    continue
+                if tags:
+                    node_tags[len(node_ids)] = tags
+                node_ids.append(node_id)
+                node_lats.append(lat)
+                node_lons.append(lon)
+            else:
+                try:
+                    way_args = parser._read_way_element(elem)
+                except Exception as e:
+                    logger.warning(f"Error parsing way: {e}")
+                    parser.stats['parsing_errors'] += 1
+                    continue
+                if way_args is not None:
+                    ways.append((len(node_ids), way_args))
+    
+    return node_ids, node_lats, node_lons, node_tags, ways, parser.stats
+
 
 class OSMParser:
     """
@@ -53,16 +197,38 @@ class OSMParser:
         'road': 50
     }
     
-    def __init__(self, filter_highways: bool = True):
+    def __init__(self, filter_highways: bool = True, graph: Optional[Graph] = None,
+                 cache_dir: Optional[str] = None, workers: int = 1):
         """
         Initialize OSM parser
         
         Args:
             filter_highways: If True, only include roads suitable for routing
+            graph: Existing graph to add roads to (default: a new Graph)
+            cache_dir: Directory for caching parsed graphs of OSM files
+                (default: no caching)
+            workers: Worker processes for parsing files from disk (default:
+                parse in this process only)
         """
-        self.graph = Graph()
+        self.graph = graph if graph is not None else Graph()
         self.filter_highways = filter_highways
-        self.osm_nodes: Dict[int, Dict] = {}  # Temporary storage for OSM nodes
+        self.workers = workers
+        # Only graphs built from scratch can be cached
+        self.cache_dir = cache_dir if graph is None else None
+        # Temporary storage for OSM nodes as parallel arrays (indexed through
+        # _node_index), with tags kept only for the few nodes that have any
+        self._node_index: Dict[int, int] = {}
+        self._node_lats = array('d')
+        self._node_lons = array('d')
+        self._node_tags: Dict[int, Dict[str, str]] = {}
+        # Graph nodes/edges collected from ways, added to the graph in bulk
+        self._way_nodes: Dict[int, Node] = {}
+        # Consecutive node pairs of each way plus the way's attributes; turned
+        # into edges in one batch so distances are computed vectorized
+        self._way_segments: List[Tuple] = []
+        # Ways seen before some of their nodes, built once the file is read
+        self._deferred_ways: List[Tuple] = []
+        self._streaming = False
         self.stats = {
             'total_nodes': 0,
             'total_ways': 0,
@@ -71,40 +237,65 @@ class OSMParser:
             'parsing_errors': 0
         }
     
-    def parse_osm_file(self, file_path: str) -> Graph:
+    def parse_osm_file(self, file_path: Union[str, IO[bytes]]) -> Graph:
         """
         Parse an OSM XML file and return a Graph
         
         Args:
-            file_path: Path to OSM XML file
+            file_path: Path to OSM XML file, or a binary stream such as
+                OSMDownloader.open_bbox_stream()
             
         Returns:
             Graph object containing the road network
         """
+        cache_file = self._cache_file(file_path)
+        if cache_file and self._load_cached_graph(cache_file):
+            return self.graph
+        
         logger.info(f"Parsing OSM file: {file_path}")
         
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            if not (self.workers > 1 and isinstance(file_path, (str, os.PathLike))
+                    and self._parse_file_parallel(file_path)):
+                # Stream elements instead of building the whole document. OSM
+                # files normally list nodes before the ways that reference
+                # them; ways that come first are deferred until the end
+                self._streaming = True
+                for elem in _iter_osm_elements(file_path):
+                    if elem.tag == 'node':
+                        self._parse_node_element(elem)
+                    else:
+                        self._parse_way_element(elem)
+                self._streaming = False
             
-            # First pass: collect all nodes
-            logger.info("First pass: Reading nodes...")
-            for node_elem in root.findall('node'):
-                self._parse_node_element(node_elem)
+            if self._deferred_ways:
+                logger.info(f"Building {len(self._deferred_ways)} ways that preceded their nodes")
+                for way_args in self._deferred_ways:
+                    try:
+                        self._create_way_graph(*way_args)
+                    except Exception as e:
+                        logger.warning(f"Error parsing way: {e}")
+                        self.stats['parsing_errors'] += 1
+                        # It was counted as included when it was deferred
+                        self.stats['included_ways'] -= 1
+                self._deferred_ways.clear()
             
-            self.stats['total_nodes'] = len(self.osm_nodes)
+            self.stats['total_nodes'] = len(self._node_index)
             logger.info(f"Collected {self.stats['total_nodes']} nodes")
             
-            # Second pass: process ways (roads) and build graph
-            logger.info("Second pass: Processing ways...")
-            for way_elem in root.findall('way'):
-                self._parse_way_element(way_elem)
+            self.graph.add_nodes_bulk(self._way_nodes.values())
+            self.graph.add_edges_bulk(self._new_way_edges())
             
             logger.info(f"Parsed {self.stats['included_ways']} ways "
                        f"({self.stats['excluded_ways']} excluded)")
             
             # Clean up temporary data
-            self.osm_nodes.clear()
+            self._node_index.clear()
+            self._node_lats = array('d')
+            self._node_lons = array('d')
+            self._node_tags.clear()
+            self._way_nodes.clear()
+            self._way_segments.clear()
             
             # Validate the graph
             logger.info("Validating graph...")
@@ -116,6 +307,9 @@ class OSMParser:
             if validation['isolated_nodes']:
                 logger.warning(f"Found {len(validation['isolated_nodes'])} isolated nodes")
             
+            if cache_file:
+                self._save_cached_graph(cache_file)
+            
             return self.graph
             
         except Exception as e:
@@ -123,80 +317,161 @@ class OSMParser:
             self.stats['parsing_errors'] += 1
             raise
     
-    def _parse_node_element(self, node_elem: ET.Element) -> None:
-        """Parse a single OSM node element"""
-        try:
-            node_id = int(node_elem.get('id'))
-            lat = float(node_elem.get('lat'))
-            lon = float(node_elem.get('lon'))
-            
-            # Extract tags
-            tags = {}
-            for tag in node_elem.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                tags[key] = value
+    def _parse_file_parallel(self, file_path: str) -> bool:
+        """
+        Parse a file as contiguous chunks in worker processes
+        
+        Workers do the XML and tag parsing; their nodes and ways are then
+        replayed here in file order, so the graph comes out exactly as a
+        single-process parse would build it.
+        
+        Returns:
+            False (having parsed nothing) if the file has no OSM elements
+        """
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = _ELEMENT_START_RE.search(mm)
+            elements_end = mm.rfind(b'</osm>')
+            if match is None or elements_end < match.start():
+                return False
             
-            # Store node data temporarily
-            self.osm_nodes[node_id] = {
-                'lat': lat,
-                'lon': lon,
-                'tags': tags
-            }
+            # Split at element starts into one run of elements per worker
+            bounds = [match.start()]
+            step = (elements_end - bounds[0]) // self.workers
+            for i in range(1, self.workers):
+                match = _ELEMENT_START_RE.search(
+                    mm, max(bounds[-1] + 1, bounds[0] + i * step), elements_end)
+                if match is None:
+                    break
+                bounds.append(match.start())
+            bounds.append(elements_end)
+        
+        logger.info(f"Parsing with {len(bounds) - 1} worker processes")
+        self._streaming = True
+        with ProcessPoolExecutor(max_workers=len(bounds) - 1) as executor:
+            futures = [
+                executor.submit(_read_osm_chunk, file_path, start, end, self.filter_highways)
+                for start, end in zip(bounds, bounds[1:])
+            ]
             
+            for future in futures:
+                node_ids, node_lats, node_lons, node_tags, ways, stats = future.result()
+                for key in ('total_ways', 'excluded_ways', 'parsing_errors'):
+                    self.stats[key] += stats[key]
+                
+                stored = 0
+                for nodes_before, way_args in ways + [(len(node_ids), None)]:
+                    for i in range(stored, nodes_before):
+                        self._store_node(node_ids[i], node_lats[i], node_lons[i],
+                                         node_tags.get(i))
+                    stored = nodes_before
+                    if way_args is not None:
+                        self._add_way(way_args)
+        self._streaming = False
+        
+        return True
+    
+    def _cache_file(self, file_path: Union[str, IO[bytes]]) -> Optional[str]:
+        """
+        Cache path for the graph parsed from file_path
+        
+        The name is keyed on the file's path, mtime and size, so an edited or
+        re-downloaded file misses the cache. Streams are not cached.
+        """
+        if not self.cache_dir or not isinstance(file_path, (str, os.PathLike)):
+            return None
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        key = hashlib.blake2b(
+            f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}:"
+            f"{self.filter_highways}:{GRAPH_FORMAT_VERSION}".encode(),
+            digest_size=16
+        ).hexdigest()
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{key}.graph")
+    
+    def _load_cached_graph(self, cache_file: str) -> bool:
+        """Load a graph and its parsing stats saved by _save_cached_graph"""
+        try:
+            with open(f"{cache_file}.json", 'rb') as f:
+                stats = orjson.loads(f.read())
+            graph = Graph()
+            graph.load_from_file(cache_file)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache {cache_file}: {e}")
+            return False
+        
+        self.graph = graph
+        self.stats.update(stats)
+        logger.info(f"Loaded parsed graph from cache {cache_file}")
+        return True
+    
+    def _save_cached_graph(self, cache_file: str) -> None:
+        """Save the parsed graph and stats; the stats file is written last"""
+        try:
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            self.graph.save_to_file(tmp_file)
+            os.replace(tmp_file, cache_file)
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(self.stats))
+            os.replace(tmp_file, f"{cache_file}.json")
+        except OSError as e:
+            logger.debug(f"Could not cache parsed graph: {e}")
+    
+    def _parse_node_element(self, node_elem: _Element) -> None:
+        """Parse a single OSM node element"""
+        try:
+            self._store_node(*self._read_node_element(node_elem))
         except (ValueError, TypeError) as e:
             logger.warning(f"Error parsing node: {e}")
             self.stats['parsing_errors'] += 1
     
-    def _parse_way_element(self, way_elem: ET.Element) -> None:
+    def _read_node_element(self, node_elem: _Element) -> Tuple[int, float, float,
+                                                                Optional[Dict[str, str]]]:
+        """Read a node element's (id, lat, lon, tags); tags is None for bare nodes"""
+        node_id = int(node_elem.get('id'))
+        lat = float(node_elem.get('lat'))
+        lon = float(node_elem.get('lon'))
+        
+        # Extract tags; almost all nodes have no children at all
+        return node_id, lat, lon, _read_tags(node_elem) if len(node_elem) else None
+    
+    def _store_node(self, node_id: int, lat: float, lon: float,
+                    tags: Optional[Dict[str, str]]) -> None:
+        """Store node data temporarily (a repeated ID replaces the earlier one)"""
+        self._node_index[node_id] = len(self._node_lats)
+        self._node_lats.append(lat)
+        self._node_lons.append(lon)
+        if tags:
+            self._node_tags[node_id] = tags
+        else:
+            self._node_tags.pop(node_id, None)
+    
+    def _parse_way_element(self, way_elem: _Element) -> None:
         """Parse a single OSM way element (road)"""
         try:
-            way_id = int(way_elem.get('id'))
-            self.stats['total_ways'] += 1
-            
-            # Extract tags
-            tags = {}
-            for tag in way_elem.findall('tag'):
-                key = tag.get('k')
-                value = tag.get('v')
-                tags[key] = value
-            
-            # Check if this is a road we want to include
-            highway_type = tags.get('highway')
-            if not highway_type:
-                self.stats['excluded_ways'] += 1
-                return
-            
-            if self.filter_highways and highway_type not in self.ALLOWED_HIGHWAY_TYPES:
-                self.stats['excluded_ways'] += 1
-                return
-            
-            # Get node references (the path of the road)
-            node_refs = []
-            for nd in way_elem.findall('nd'):
-                ref = int(nd.get('ref'))
-                node_refs.append(ref)
-            
-            if len(node_refs) < 2:
-                logger.warning(f"Way {way_id} has less than 2 nodes, skipping")
-                self.stats['excluded_ways'] += 1
-                return
-            
-            # Check if it's a one-way street
-            oneway = tags.get('oneway', 'no')
-            is_oneway = oneway in ['yes', 'true', '1']
-            if highway_type == 'motorway':
-                is_oneway = True  # Motorways are always one-way
-            
-            # Get speed limit
-            max_speed = self._extract_speed(tags, highway_type)
-            
-            # Get road name
-            name = tags.get('name', tags.get('ref', f'Way {way_id}'))
-            
-            # Create nodes and edges for this way
-            self._create_way_graph(node_refs, highway_type, max_speed, name, 
-                                  is_oneway, tags)
+            way_args = self._read_way_element(way_elem)
+        except Exception as e:
+            logger.warning(f"Error parsing way: {e}")
+            self.stats['parsing_errors'] += 1
+            return
+        
+        if way_args is not None:
+            self._add_way(way_args)
+    
+    def _add_way(self, way_args: Tuple) -> None:
+        """Create nodes and edges for a way read by _read_way_element"""
+        try:
+            # Ways seen before some of their nodes wait for the end of the file
+            if self._streaming and not all(ref in self._node_index for ref in way_args[0]):
+                self._deferred_ways.append(way_args)
+            else:
+                self._create_way_graph(*way_args)
             
             self.stats['included_ways'] += 1
             
@@ -204,6 +479,57 @@ class OSMParser:
             logger.warning(f"Error parsing way: {e}")
             self.stats['parsing_errors'] += 1
     
+    def _read_way_element(self, way_elem: _Element) -> Optional[Tuple]:
+        """
+        Read a way element into _create_way_graph arguments
+        
+        Returns:
+            (node_refs, highway_type, max_speed, name, is_oneway, tags), or
+            None for ways that are not included
+        """
+        way_id = int(way_elem.get('id'))
+        self.stats['total_ways'] += 1
+        
+        # Check if this is a road we want to include before reading the
+        # rest of the tags and the node list
+        highway_tag = way_elem.find("tag[@k='highway']")
+        highway_type = highway_tag.get('v') if highway_tag is not None else None
+        if not highway_type:
+            self.stats['excluded_ways'] += 1
+            return None
+        
+        if self.filter_highways and highway_type not in self.ALLOWED_HIGHWAY_TYPES:
+            self.stats['excluded_ways'] += 1
+            return None
+        
+        # Extract tags
+        tags = _read_tags(way_elem)
+        
+        # Get node references (the path of the road)
+        node_refs = []
+        for nd in way_elem.iterfind('nd'):
+            ref = int(nd.get('ref'))
+            node_refs.append(ref)
+        
+        if len(node_refs) < 2:
+            logger.warning(f"Way {way_id} has less than 2 nodes, skipping")
+            self.stats['excluded_ways'] += 1
+            return None
+        
+        # Check if it's a one-way street
+        oneway = tags.get('oneway', 'no')
+        is_oneway = oneway in ['yes', 'true', '1']
+        if highway_type == 'motorway':
+            is_oneway = True  # Motorways are always one-way
+        
+        # Get speed limit
+        max_speed = self._extract_speed(tags, highway_type)
+        
+        # Get road name
+        name = tags.get('name', tags.get('ref', f'Way {way_id}'))
+        
+        return (node_refs, highway_type, max_speed, name, is_oneway, tags)
+    
     def _create_way_graph(self, node_refs: List[int], highway_type: str,
                          max_speed: int, name: str, is_oneway: bool,
                          tags: Dict[str, str]) -> None:
@@ -224,54 +550,90 @@ class OSMParser:
         # Create or get nodes
         graph_nodes = []
         for osm_id in node_refs:
-            if osm_id not in self.osm_nodes:
+            idx = self._node_index.get(osm_id)
+            if idx is None:
                 logger.warning(f"Node {osm_id} referenced but not found")
                 continue
             
-            node_data = self.osm_nodes[osm_id]
-            
-            # Check if node already exists in graph
-            existing_node = self.graph.get_node(osm_id)
+            # Check if node was already created by an earlier way (or file)
+            existing_node = self._way_nodes.get(osm_id) or self.graph.get_node(osm_id)
             if existing_node:
                 graph_nodes.append(existing_node)
             else:
                 # Create new node
                 node = Node(
                     id=osm_id,
-                    latitude=node_data['lat'],
-                    longitude=node_data['lon'],
-                    tags=node_data['tags']
+                    latitude=self._node_lats[idx],
+                    longitude=self._node_lons[idx],
+                    tags=self._node_tags.get(osm_id, {})
                 )
-                self.graph.add_node(node)
+                self._way_nodes[osm_id] = node
                 graph_nodes.append(node)
         
         if len(graph_nodes) < 2:
             return
         
-        # Create edges between consecutive nodes
-        for i in range(len(graph_nodes) - 1):
-            from_node = graph_nodes[i]
-            to_node = graph_nodes[i + 1]
-            
-            # Calculate distance
-            distance = from_node.distance_to(to_node)
-            
-            # Create edge
-            edge = Edge(
+        # Record consecutive node pairs; edges are built in _build_way_edges
+        bidirectional = not is_oneway
+        for from_node, to_node in zip(graph_nodes, graph_nodes[1:]):
+            if from_node is to_node:
+                raise ValueError("Edge cannot connect a node to itself")
+            self._way_segments.append((from_node, to_node, road_type, max_speed,
+                                       tags, bidirectional, name))
+    
+    def _new_way_edges(self) -> List[Edge]:
+        """
+        Way edges for segments not yet in the graph or earlier in this batch
+        
+        Segments already present (e.g. from an overlapping file, or a way
+        running the other way) keep their first definition. A two-way edge
+        is stored once, so the reverse key is checked too, as get_edge does.
+        """
+        new_edges: Dict[Tuple[int, int], Edge] = {}
+        for edge in self._build_way_edges():
+            key = (edge.from_node_id, edge.to_node_id)
+            if key in new_edges or self.graph.get_edge(*key) is not None:
+                continue
+            reverse = new_edges.get((key[1], key[0]))
+            if reverse is not None and reverse.bidirectional:
+                continue
+            new_edges[key] = edge
+        return list(new_edges.values())
+    
+    def _build_way_edges(self) -> List[Edge]:
+        """
+        Create Edge objects for all recorded segments, with batched distances
+        
+        Segments join consecutive way nodes, usually well under 100 m apart,
+        where the equirectangular approximation is within millimeters of
+        haversine
+        """
+        if not self._way_segments:
+            return []
+        
+        count = len(self._way_segments)
+        segments = self._way_segments
+        distances = equirect_vec(
+            np.fromiter((seg[0].latitude for seg in segments), dtype=np.float64, count=count),
+            np.fromiter((seg[0].longitude for seg in segments), dtype=np.float64, count=count),
+            np.fromiter((seg[1].latitude for seg in segments), dtype=np.float64, count=count),
+            np.fromiter((seg[1].longitude for seg in segments), dtype=np.float64, count=count)
+        )
+        
+        return [
+            Edge(
                 from_node_id=from_node.id,
                 to_node_id=to_node.id,
                 weight=distance,
                 road_type=road_type,
                 max_speed=max_speed,
                 tags=tags,
-                bidirectional=not is_oneway,
+                bidirectional=bidirectional,
                 name=name
             )
-            
-            try:
-                self.graph.add_edge(edge)
-            except Exception as e:
-                logger.warning(f"Error adding edge {from_node.id}->{to_node.id}: {e}")
+            for (from_node, to_node, road_type, max_speed, tags, bidirectional, name), distance
+            in zip(segments, distances.tolist())
+        ]
     
     def _extract_speed(self, tags: Dict[str, str], highway_type: str) -> int:
         """
@@ -288,18 +650,17 @@ class OSMParser:
         
         if maxspeed:
             # Handle different formats: "50", "50 mph", "50 km/h"
-            try:
-                # Extract numeric part
-                speed_str = ''.join(filter(str.isdigit, maxspeed))
-                speed = int(speed_str)
+            match = _MAXSPEED_RE.match(maxspeed)
+            if match:
+                speed = int(match.group(1))
                 
                 # Convert mph to km/h if needed
-                if 'mph' in maxspeed.lower():
+                if match.group(2):
                     speed = int(speed * 1.60934)
                 
-                return speed
-            except ValueError:
-                pass
+                # "0" is a tagging error, not a closed road
+                if speed > 0:
+                    return speed
         
         # Use default speed for this highway type
         return self.DEFAULT_SPEEDS.get(highway_type, 50)
@@ -331,5 +692,6 @@ class OSMParser:
         return {
             **self.stats,
             'graph_nodes': len(self.graph.nodes),
-            'graph_edges': len(self.graph.edges)
+            'graph_edges': len(self.graph.edges),
+            'graph_arcs': self.graph.arc_count
         }
@@ -5,7 +5,12 @@ Geographic utility functions for distance calculations and coordinate operations
 import math
 from typing import Tuple
 
+import numpy as np
 
+from .jit import njit, FASTMATH
+
+
+@njit('float64(float64, float64, float64, float64)', cache=True, fastmath=FASTMATH)
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points on Earth using the Haversine formula
@@ -37,6 +42,80 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return c * r
 
 
+@njit('float64(float64, float64, float64, float64, float64)', cache=True, fastmath=FASTMATH)
+def haversine_rad(lat1_rad: float, cos_lat1: float, lat2_rad: float, cos_lat2: float,
+                  dlon_rad: float) -> float:
+    """
+    haversine_distance on precomputed terms, for callers that keep each
+    point's radians and cos(latitude) around instead of redoing the trig
+    
+    Args:
+        lat1_rad, cos_lat1: Latitude of first point in radians and its cosine
+        lat2_rad, cos_lat2: Latitude of second point in radians and its cosine
+        dlon_rad: Longitude difference in radians
+        
+    Returns:
+        Distance in meters
+    """
+    sin_dlat = math.sin((lat2_rad - lat1_rad) / 2)
+    sin_dlon = math.sin(dlon_rad / 2)
+    a = sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * sin_dlon * sin_dlon
+    return 2 * math.asin(math.sqrt(a)) * 6371000
+
+
+def haversine_vec(lat1: np.ndarray, lon1: np.ndarray,
+                  lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """
+    Vectorized haversine_distance over arrays of coordinate pairs
+    
+    Args:
+        lat1, lon1: Coordinates of first points
+        lat2, lon2: Coordinates of second points
+        
+    Returns:
+        Array of distances in meters
+    """
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = np.radians(lon2) - np.radians(lon1)
+    
+    a = (np.sin(dlat / 2) ** 2 +
+         np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2) ** 2)
+    return 2 * 6371000 * np.arcsin(np.sqrt(a))
+
+
+@njit('float64(float64, float64, float64, float64)', cache=True, fastmath=FASTMATH)
+def equirect_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Equirectangular approximation of haversine_distance
+    
+    Within a fraction of a meter for points up to a few kilometers apart
+    (consecutive OSM way nodes), at one cos and one sqrt instead of the full
+    haversine trig. Use haversine_distance for long ranges.
+    
+    Returns:
+        Distance in meters
+    """
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    return 6371000 * math.sqrt(dlat * dlat + dlon * dlon)
+
+
+def equirect_vec(lat1: np.ndarray, lon1: np.ndarray,
+                 lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equirect_distance over arrays of coordinate pairs
+    
+    Returns:
+        Array of distances in meters
+    """
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1) * np.cos(np.radians((lat1 + lat2) / 2))
+    return 6371000 * np.sqrt(dlat * dlat + dlon * dlon)
+
+
+@njit('float64(float64, float64, float64, float64)', cache=True, fastmath=FASTMATH)
 def bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the bearing (compass direction) from point 1 to point 2
@@ -84,6 +163,13 @@ def bounding_box(lat: float, lon: float, distance: float) -> Tuple[float, float,
     )
 
 
+@njit('boolean(float64, float64, float64, float64, float64, float64)', cache=True)
+def _point_in_bbox(lat: float, lon: float, min_lat: float, min_lon: float,
+                   max_lat: float, max_lon: float) -> bool:
+    """Compiled body of point_in_bbox, taking the bbox corners as scalars"""
+    return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+
 def point_in_bbox(lat: float, lon: float, bbox: Tuple[float, float, float, float]) -> bool:
     """
     Check if a point is within a bounding box
@@ -96,4 +182,4 @@ def point_in_bbox(lat: float, lon: float, bbox: Tuple[float, float, float, float
         True if point is within bounding box
     """
     min_lat, min_lon, max_lat, max_lon = bbox
-    return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
\ No newline at end of file
+    return _point_in_bbox(lat, lon, min_lat, min_lon, max_lat, max_lon)
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""
+Optional Numba JIT support
+Kernels decorated with njit run as plain Python when numba is not installed
+"""
+
+# fastmath flags for geometry kernels. nnan/ninf are left out because kernels
+# use inf as a "not found" sentinel; contract/reassoc are left out so the
+# distance of a point to itself stays exactly 0.
+FASTMATH = {'nsz', 'arcp', 'afn'}
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (signatures and options are ignored)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -4,81 +4,77 @@ All project paths flow through here
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 
+# This file is at: backend/src/utils/path_utils.py
+# Go up 3 levels: utils -> src -> backend -> project_root
+_ROOT = Path(__file__).resolve().parents[3]
+
 
 def get_project_root() -> Path:
     """
     Get absolute path to project root
     Works from any file in the project
     """
-    # This file is at: backend/src/utils/path_utils.py
-    # Go up 3 levels: utils -> src -> backend -> project_root
-    current_file = Path(__file__).resolve()
-    backend_dir = current_file.parent.parent.parent
-    project_root = backend_dir.parent
-    return project_root
+    return _ROOT
 
 
+@lru_cache(maxsize=None)
 def get_backend_dir() -> Path:
     """Get absolute path to backend directory"""
     return get_project_root() / "backend"
 
 
+@lru_cache(maxsize=None)
 def get_src_dir() -> Path:
     """Get absolute path to src directory"""
     return get_backend_dir() / "src"
 
 
+@lru_cache(maxsize=None)
 def get_data_dir() -> Path:
     """Get absolute path to data directory"""
-    data_dir = get_backend_dir() / "data"
-    data_dir.mkdir(parents=True, exist_ok=True)
-    return data_dir
+    return get_backend_dir() / "data"
 
 
+@lru_cache(maxsize=None)
 def get_maps_dir() -> Path:
     """Get absolute path to maps directory"""
-    maps_dir = get_data_dir() / "maps"
-    maps_dir.mkdir(parents=True, exist_ok=True)
-    return maps_dir
+    return get_data_dir() / "maps"
 
 
+@lru_cache(maxsize=None)
 def get_hanoi_maps_dir() -> Path:
     """Get absolute path to Hanoi maps directory"""
-    hanoi_dir = get_maps_dir() / "hanoi"
-    hanoi_dir.mkdir(parents=True, exist_ok=True)
-    return hanoi_dir
+    return get_maps_dir() / "hanoi"
 
 
+@lru_cache(maxsize=None)
 def get_processed_dir() -> Path:
     """Get absolute path to processed data directory"""
-    processed_dir = get_data_dir() / "processed"
-    processed_dir.mkdir(parents=True, exist_ok=True)
-    return processed_dir
+    return get_data_dir() / "processed"
 
 
+@lru_cache(maxsize=None)
 def get_cache_dir() -> Path:
     """Get absolute path to cache directory"""
-    cache_dir = get_data_dir() / "cache"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir
+    return get_data_dir() / "cache"
 
 
+@lru_cache(maxsize=None)
 def get_config_dir() -> Path:
     """Get absolute path to config directory"""
-    config_dir = get_backend_dir() / "config"
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir
+    return get_backend_dir() / "config"
 
 
+@lru_cache(maxsize=None)
 def get_logs_dir() -> Path:
     """Get absolute path to logs directory"""
-    logs_dir = get_backend_dir() / "logs"
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    return logs_dir
+    return get_backend_dir() / "logs"
 
 
+@lru_cache(maxsize=None)
 def get_scripts_dir() -> Path:
     """Get absolute path to scripts directory"""
     return get_backend_dir() / "scripts"
@@ -129,7 +125,10 @@ def get_log_file(name: str = "app.log") -> Path:
 # === Utility functions ===
 
 def ensure_all_directories():
-    """Create all necessary directories"""
+    """
+    Create all necessary directories
+    The get_*_dir functions are cached and don't create anything themselves
+    """
     directories = [
         get_data_dir(),
         get_maps_dir(),
@@ -158,5 +157,7 @@ def get_path_info() -> dict:
     }
 
 
-# Initialize directories on import
-ensure_all_directories()
\ No newline at end of file
+# Initialize directories on import (APP_INIT_DIRS=0 skips it, e.g. for
+# tests and short-lived tools that only read)
+if os.environ.get('APP_INIT_DIRS', '1') == '1':
+    ensure_all_directories()
\ No newline at end of file
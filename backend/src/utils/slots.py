@@ -0,0 +1,38 @@
+"""
+Slotted dataclasses on every supported Python
+dataclass(slots=True) only exists on 3.10+; older interpreters get the same
+result by rebuilding the class with __slots__ after dataclass() runs
+"""
+
+import sys
+from dataclasses import dataclass, fields
+
+
+def slotted_dataclass(cls=None, **kwargs):
+    """dataclass() that always generates __slots__ (no per-instance __dict__)"""
+    def wrap(cls):
+        if sys.version_info >= (3, 10):
+            return dataclass(cls, slots=True, **kwargs)
+        return _add_slots(dataclass(cls, **kwargs))
+
+    return wrap if cls is None else wrap(cls)
+
+
+def _add_slots(cls):
+    """Recreate a dataclass with one slot per field (what slots=True does)"""
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+
+    # Plain defaults live in the generated __init__; as class attributes they
+    # would shadow the slot descriptors
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+
+    qualname = getattr(cls, '__qualname__', None)
+    cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    if qualname is not None:
+        cls.__qualname__ = qualname
+    return cls
@@ -0,0 +1,123 @@
+"""Tests for DestinationCache"""
+
+import os
+import signal
+import threading
+
+import pytest
+
+from src.cache.destination_cache import DestinationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DestinationCache(str(tmp_path / "routes.db"))
+    yield cache
+    cache.shutdown()
+
+
+def test_cache_route_round_trip(cache):
+    assert cache.cache_route(1, 3, [1, 2, 3], 208.0, 15.0)
+    assert cache.get_cached_route(1, 3)['path'] == [1, 2, 3]
+    assert cache.get_bidirectional_route(3, 1)['path'] == [3, 2, 1]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_forked_child_does_not_inherit_held_lock(cache):
+    cache.cache_route(1, 3, [1, 2, 3], 208.0, 15.0)
+    assert cache.get_cache_statistics()['total_routes'] == 1
+    
+    # Another parent thread holds the lock across the fork
+    locked, release = threading.Event(), threading.Event()
+    
+    def hold_lock():
+        with cache._lock:
+            locked.set()
+            release.wait()
+    
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            signal.alarm(10)  # a deadlock kills the child instead of the run
+            ok = (cache.get_cached_route(1, 3)['path'] == [1, 2, 3]
+                  and cache.get_cache_statistics()['total_routes'] == 1)
+            os._exit(0 if ok else 1)
+    finally:
+        release.set()
+        holder.join()
+    
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    
+    # The parent's own connection is still usable
+    assert cache.get_cached_route(1, 3)['path'] == [1, 2, 3]
+
+
+def _access_count(cache, start_id, end_id):
+    with cache._lock:
+        cursor = cache._connection().cursor()
+        cursor.execute('SELECT access_count FROM cached_routes WHERE start_id = ? AND end_id = ?',
+                       (start_id, end_id))
+        return cursor.fetchone()[0]
+
+
+def test_bidirectional_lookup_reverses_route_stored_other_way(cache):
+    cache.cache_route(1, 4, [1, 2, 3, 4], 300.0, 20.0)
+    
+    route = cache.get_bidirectional_route(4, 1)
+    
+    assert route['path'] == [4, 3, 2, 1]
+    assert (route['distance'], route['travel_time'], route['nodes_count']) == (300.0, 20.0, 4)
+    assert route['cached']
+    # The hit is recorded on the stored row; nothing is written for 4 -> 1
+    assert _access_count(cache, 1, 4) == 1
+    assert cache.get_cached_route(4, 1) is None
+
+
+def test_bidirectional_lookup_prefers_forward_route(cache):
+    cache.cache_route(1, 4, [1, 2, 3, 4], 300.0, 20.0)
+    cache.cache_route(4, 1, [4, 5, 1], 250.0, 18.0)
+    
+    assert cache.get_bidirectional_route(4, 1)['path'] == [4, 5, 1]
+    assert cache.get_bidirectional_route(1, 4)['path'] == [1, 2, 3, 4]
+    assert _access_count(cache, 4, 1) == 1
+    assert _access_count(cache, 1, 4) == 1
+
+
+def test_bidirectional_lookup_ignores_unrelated_routes(cache):
+    cache.cache_route(1, 4, [1, 2, 3, 4], 300.0, 20.0)
+    
+    assert cache.get_bidirectional_route(1, 3) is None
+    assert cache.get_bidirectional_route(4, 2) is None
+    stats = cache.get_cache_statistics()
+    assert (stats['total_hits'], stats['total_misses']) == (0, 2)
+
+
+def test_bulk_upsert_of_existing_keys_keeps_cache_size(cache):
+    assert cache.cache_routes_bulk([(1, 2, [1, 2], 100.0, 8.0),
+                                    (2, 3, [2, 3], 110.0, 9.0)]) == 2
+    assert cache.cache_route(3, 4, [3, 4], 120.0, 10.0)
+    assert cache.stats['cache_size'] == 3
+    cache.get_cached_route(1, 2)
+    
+    # Two existing keys, one key repeated within the batch, one new key
+    assert cache.cache_routes_bulk([(1, 2, [1, 5, 2], 150.0, 12.0),
+                                    (3, 4, [3, 5, 4], 160.0, 13.0),
+                                    (4, 5, [4, 5], 90.0, 7.0),
+                                    (4, 5, [4, 6, 5], 95.0, 7.5)]) == 4
+    assert cache.stats['cache_size'] == 4
+    assert cache.get_cache_statistics()['total_routes'] == 4
+    
+    # Updated in place: new data, same access count
+    assert _access_count(cache, 1, 2) == 1
+    assert cache.get_cached_route(1, 2)['path'] == [1, 5, 2]
+    assert cache.get_cached_route(4, 5)['path'] == [4, 6, 5]
+    
+    # Single-route writes keep counting from the same size
+    assert cache.cache_route(1, 2, [1, 2], 100.0, 8.0)
+    assert cache.cache_route(5, 6, [5, 6], 100.0, 8.0)
+    assert cache.stats['cache_size'] == 5
+    assert cache.get_cache_statistics()['total_routes'] == 5
@@ -0,0 +1,13 @@
+"""Tests for geo_utils"""
+
+from src.utils.geo_utils import point_in_bbox
+
+_HOAN_KIEM = [21.015, 105.840, 21.040, 105.865]
+
+
+def test_point_in_bbox_accepts_tuple_and_list_bbox():
+    assert point_in_bbox(21.03, 105.85, _HOAN_KIEM)
+    assert point_in_bbox(21.015, 105.865, _HOAN_KIEM)
+    assert not point_in_bbox(21.05, 105.85, _HOAN_KIEM)
+    assert not point_in_bbox(21.03, 105.83, _HOAN_KIEM)
+    assert point_in_bbox(21.03, 105.85, tuple(_HOAN_KIEM))
@@ -0,0 +1,213 @@
+"""Tests for Graph CSR bookkeeping"""
+
+import os
+import pickle
+
+import pytest
+import yaml
+
+from src.algorithms.astar import AStar
+from src.core.edge import Edge, RoadType
+from src.core.graph import Graph, cKDTree
+from src.core.node import Node
+from src.utils.path_utils import get_config_file
+
+
+def _line_graph():
+    """Three nodes where only 1 <-> 2 is connected"""
+    graph = Graph()
+    for node_id, lon in ((1, 105.850), (2, 105.851), (3, 105.852)):
+        graph.add_node(Node(node_id, 21.03, lon))
+    graph.add_edge(Edge(1, 2, 104.0))
+    graph.build_csr()
+    return graph
+
+
+def test_astar_sees_node_add_neighbor_after_csr_build():
+    graph = _line_graph()
+    assert AStar(graph).find_path(1, 3) is None
+    
+    graph.nodes[2].add_neighbor(graph.nodes[3], 104.0)
+    
+    assert graph.csr_is_stale()
+    assert AStar(graph).find_path(1, 3) == [1, 2, 3]
+
+
+def test_csr_stale_after_remove_neighbor_and_direct_edge_write():
+    graph = _line_graph()
+    graph.nodes[1].remove_neighbor(2)
+    assert graph.csr_is_stale()
+    assert AStar(graph).find_path(1, 2) is None
+    
+    graph.build_csr()
+    graph.edges[(2, 3)] = Edge(2, 3, 104.0)
+    assert graph.csr_is_stale()
+
+
+def test_save_load_round_trip_after_add_neighbor(tmp_path):
+    graph = _line_graph()
+    graph.nodes[2].add_neighbor(graph.nodes[3], 104.5)
+    
+    path = tmp_path / "graph.npz"
+    graph.save_to_file(str(path))
+    loaded = Graph()
+    loaded.load_from_file(str(path))
+    
+    assert loaded.nodes[2].get_neighbor_weight(3) == 104.5
+    assert AStar(loaded).find_path(1, 3) == [1, 2, 3]
+
+
+def test_save_skips_neighbors_outside_graph(tmp_path):
+    graph = _line_graph()
+    graph.nodes[2].add_neighbor(Node(99, 21.03, 105.853), 50.0)
+    
+    path = tmp_path / "graph.npz"
+    graph.save_to_file(str(path))
+    loaded = Graph()
+    loaded.load_from_file(str(path))
+    
+    assert loaded.nodes[2].get_neighbor_weight(1) == 104.0
+    assert loaded.nodes[2].get_neighbor_weight(99) is None
+
+
+def test_edge_and_arc_counts():
+    graph = _line_graph()
+    graph.add_edge(Edge(2, 3, 104.0, bidirectional=False))
+    
+    stats = graph.get_statistics()
+    assert stats['edge_count'] == len(graph.edges) == 2
+    assert stats['arc_count'] == graph.arc_count == 3
+
+
+def test_node_edits_only_mark_their_own_graph_stale():
+    graph = _line_graph()
+    other = _line_graph()
+    
+    other.nodes[2].add_neighbor(other.nodes[3], 104.0)
+    
+    assert other.csr_is_stale()
+    assert not graph.csr_is_stale()
+
+
+def test_loaded_graph_tracks_node_edits(tmp_path):
+    path = tmp_path / "graph.npz"
+    _line_graph().save_to_file(str(path))
+    loaded = Graph()
+    loaded.load_from_file(str(path))
+    assert not loaded.csr_is_stale()
+    
+    loaded.nodes[2].add_neighbor(loaded.nodes[3], 104.0)
+    assert AStar(loaded).find_path(1, 3) == [1, 2, 3]
+
+
+def test_pickled_node_drops_graph_counter():
+    graph = _line_graph()
+    node = pickle.loads(pickle.dumps(graph.nodes[1]))
+    
+    assert node._version is None
+    assert node == graph.nodes[1]
+    node.add_neighbor(graph.nodes[3], 10.0)
+    assert not graph.csr_is_stale()
+
+
+def _shifted_line_graph(offset):
+    """Same node ids and count as _line_graph, at other coordinates"""
+    graph = Graph()
+    for node_id, lon in ((1, 105.852), (2, 105.851), (3, 105.850)):
+        graph.add_node(Node(node_id, 21.03 + offset, lon))
+    graph.add_edge(Edge(1, 2, 104.0))
+    graph.build_csr()
+    return graph
+
+
+@pytest.mark.skipif(cKDTree is None, reason="needs scipy")
+def test_saved_kdtree_is_adopted_for_same_nodes(tmp_path):
+    path = str(tmp_path / "graph.npz")
+    graph = _line_graph()
+    graph.save_to_file(path)
+    graph.save_kdtree(path)
+    
+    loaded = Graph()
+    loaded.load_from_file(path)
+    
+    assert loaded._kdtree is not None
+    assert loaded._kdtree_version == loaded.csr_version
+
+
+@pytest.mark.skipif(cKDTree is None, reason="needs scipy")
+def test_stale_kdtree_sidecar_is_rejected(tmp_path):
+    path = str(tmp_path / "graph.npz")
+    old = _line_graph()
+    old.save_to_file(path)
+    old.save_kdtree(path)
+    
+    # Rewrite the graph with the same node count, leaving a newer old tree
+    _shifted_line_graph(0.0).save_to_file(path)
+    tree_stat = os.stat(f"{path}.kdtree.pkl")
+    os.utime(f"{path}.kdtree.pkl", ns=(tree_stat.st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    
+    loaded = Graph()
+    loaded.load_from_file(path)
+    
+    assert loaded._kdtree is None
+    nearest = loaded.find_k_nearest_nodes(21.03, 105.852, k=1)
+    assert [node.id for node, _ in nearest] == [1]
+
+
+def _hanoi_speed_adjustments():
+    with open(get_config_file("hanoi_config.yaml"), 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)['routing']['speed_adjustments']
+
+
+def _road_type_graph():
+    """One edge per road type, half of them without a speed limit"""
+    graph = Graph()
+    for i, road_type in enumerate(RoadType):
+        graph.add_node(Node(2 * i, 21.03, 105.85 + 0.002 * i))
+        graph.add_node(Node(2 * i + 1, 21.03, 105.851 + 0.002 * i))
+        graph.add_edge(Edge(2 * i, 2 * i + 1, 104.0, road_type=road_type,
+                            max_speed=90 if i % 2 else None, bidirectional=bool(i % 3)))
+    graph.build_csr()
+    return graph
+
+
+def _expected_speeds(graph, factors):
+    return {
+        key: int((edge.max_speed or edge.get_default_speed()) * factors.get(edge.road_type.value, 1.0))
+        for key, edge in graph.edges.items()
+    }
+
+
+@pytest.mark.parametrize('calls', [1, 2, 3])
+def test_scale_max_speeds_applies_config_factors_once(calls):
+    factors = _hanoi_speed_adjustments()
+    graph = _road_type_graph()
+    expected = _expected_speeds(graph, factors)
+    
+    for _ in range(calls):
+        adjusted = graph.scale_max_speeds(factors)
+    
+    assert adjusted == sum(road_type.value in factors for road_type in RoadType)
+    assert {key: edge.max_speed or int(edge.get_default_speed())
+            for key, edge in graph.edges.items()} == expected
+    assert not graph.csr_is_stale()
+    arc_speeds = graph.edge_max_speed.tolist()
+    graph.build_csr()
+    assert arc_speeds == graph.edge_max_speed.tolist()
+    assert sorted(set(arc_speeds)) == sorted(set(expected.values()))
+
+
+def test_scale_max_speeds_replaces_earlier_factors():
+    graph = _road_type_graph()
+    primary = graph.get_edges_by_road_type(RoadType.PRIMARY)[0]
+    original = primary.max_speed
+    base_speed = original or int(primary.get_default_speed())
+    
+    graph.scale_max_speeds({'primary': 0.5})
+    graph.scale_max_speeds({'primary': 0.8})
+    assert primary.max_speed == int(base_speed * 0.8)
+    
+    graph.scale_max_speeds({})
+    assert primary.max_speed == original
+    graph.build_csr()
+    assert graph.edge_max_speed.tolist() == _road_type_graph().edge_max_speed.tolist()
@@ -0,0 +1,55 @@
+"""Tests for JSON graph storage"""
+
+import orjson
+import pytest
+
+from src.core.edge import Edge
+from src.core.graph import Graph
+from src.core.graph_json import load_graph_json, save_graph_json
+from src.core.node import Node
+
+
+@pytest.fixture
+def graph():
+    graph = Graph()
+    for node_id, lon in ((1, 105.850), (2, 105.851), (3, 105.852)):
+        graph.add_node(Node(node_id, 21.03, lon))
+    graph.add_edge(Edge(1, 2, 104.0, name='Phố Huế'))
+    graph.add_edge(Edge(2, 3, 104.0, bidirectional=False))
+    return graph
+
+
+@pytest.mark.parametrize('name, written', [
+    ('graph.json', 'graph.json.gz'),
+    ('graph.dat', 'graph.dat.gz'),
+    ('graph.json.gz', 'graph.json.gz'),
+])
+def test_round_trip_for_any_file_name(tmp_path, graph, name, written):
+    filename = str(tmp_path / name)
+    save_graph_json(graph, filename)
+    assert [p.name for p in tmp_path.iterdir()] == [written]
+    
+    loaded = Graph()
+    load_graph_json(loaded, filename)
+    
+    assert set(loaded.nodes) == {1, 2, 3}
+    assert loaded.get_edge(1, 2).name == 'Phố Huế'
+    assert loaded.nodes[3].get_neighbor_weight(2) is None
+
+
+def test_load_plain_json(tmp_path, graph):
+    save_graph_json(graph, str(tmp_path / "graph.json"))
+    loaded = Graph()
+    load_graph_json(loaded, str(tmp_path / "graph.json.gz"))
+    
+    plain = tmp_path / "plain.json"
+    plain.write_bytes(orjson.dumps({
+        'nodes': [{'id': n.id, 'lat': n.latitude, 'lon': n.longitude,
+                   'neighbors': [(nbr.id, w) for nbr, w in n.iter_neighbors()]}
+                  for n in loaded.nodes.values()],
+        'edges': []
+    }))
+    reloaded = Graph()
+    load_graph_json(reloaded, str(plain))
+    
+    assert reloaded.nodes[1].get_neighbor_weight(2) == 104.0
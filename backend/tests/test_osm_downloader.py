@@ -0,0 +1,110 @@
+"""Tests for splitting multi-bbox Overpass responses"""
+
+import io
+
+import pytest
+
+from src.data.osm_downloader import OSMDownloader
+from src.data.osm_parser import OSMParser
+
+_HEADER = b"""<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6" generator="Overpass API 0.7.62.1 084b4234">
+<note>The data included in this document is from www.openstreetmap.org.</note>
+<meta osm_base="2024-05-01T00:00:00Z"/>
+
+"""
+
+
+def _section(way_id, first_node):
+    return f"""  <way id="{way_id}">
+    <nd ref="{first_node}"/>
+    <nd ref="{first_node + 1}"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <node id="{first_node}" lat="21.0300" lon="105.8500"/>
+  <node id="{first_node + 1}" lat="21.0300" lon="105.8510"/>
+""".encode()
+
+
+def _count(nodes, ways):
+    return f"""  <count id="0">
+    <tag k="nodes" v="{nodes}"/>
+    <tag k="ways" v="{ways}"/>
+    <tag k="relations" v="0"/>
+    <tag k="total" v="{nodes + ways}"/>
+  </count>
+""".encode()
+
+
+# Three bboxes; the middle one has no roads at all
+_RESPONSE = (_HEADER + _section(10, 1) + _count(2, 1) + _count(0, 0)
+             + _section(30, 5) + _count(2, 1) + b"</osm>\n")
+
+_BBOXES = [(21.02, 105.84, 21.04, 105.86)] * 3
+
+
+class _FakeResponse:
+    """Just enough of requests.Response for download_many"""
+    
+    def __init__(self, body, status_code=200):
+        self.raw = io.BytesIO(body)
+        self.status_code = status_code
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def downloader(monkeypatch):
+    downloader = OSMDownloader()
+    monkeypatch.setattr(downloader, '_post', lambda query, stream=False: _FakeResponse(downloader.body))
+    return downloader
+
+
+def _edges(path):
+    return sorted(OSMParser().parse_osm_file(str(path)).edges)
+
+
+def test_split_assigns_each_section_to_its_file(tmp_path):
+    files = [str(tmp_path / f"d{i}.osm") for i in range(3)]
+    
+    assert OSMDownloader()._split_response(io.BytesIO(_RESPONSE), files) == 3
+    
+    assert _edges(files[0]) == [(1, 2)]
+    assert _edges(files[1]) == []
+    assert _edges(files[2]) == [(5, 6)]
+    with open(files[1], 'rb') as f:
+        assert f.read() == _HEADER + b"</osm>\n"
+
+
+def test_download_many_writes_every_district(tmp_path, downloader):
+    downloader.body = _RESPONSE
+    files = [str(tmp_path / f"d{i}.osm") for i in range(3)]
+    
+    assert downloader.download_many(_BBOXES, files)
+    
+    assert [_edges(f) for f in files] == [[(1, 2)], [], [(5, 6)]]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["d0.osm", "d1.osm", "d2.osm"]
+
+
+@pytest.mark.parametrize('body', [
+    _HEADER + _section(10, 1) + _count(2, 1) + _count(0, 0) + _section(30, 5),
+    _HEADER + _section(10, 1) + _count(2, 1),
+    _HEADER + _section(10, 1) + b'<remark> runtime error: Query timed out </remark>\n',
+])
+def test_download_many_truncated_response_keeps_old_files(tmp_path, downloader, body):
+    downloader.body = body
+    files = [str(tmp_path / f"d{i}.osm") for i in range(3)]
+    for path in files:
+        with open(path, 'wb') as f:
+            f.write(b"old")
+    
+    assert not downloader.download_many(_BBOXES, files)
+    
+    for path in files:
+        with open(path, 'rb') as f:
+            assert f.read() == b"old"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["d0.osm", "d1.osm", "d2.osm"]
@@ -0,0 +1,224 @@
+"""Tests for OSMParser"""
+
+import io
+import logging
+import os
+import random
+
+import pytest
+
+from src.core.graph import Graph
+from src.data import osm_parser
+from src.data.osm_parser import OSMParser
+
+_NODES = """
+  <node id="1" lat="21.0300" lon="105.8500"/>
+  <node id="2" lat="21.0300" lon="105.8510"/>
+  <node id="3" lat="21.0300" lon="105.8520"/>
+"""
+
+
+def _osm(*ways, nodes=_NODES):
+    """OSM document with the test nodes and (way_id, refs, extra_tags) ways"""
+    body = []
+    for way_id, refs, extra in ways:
+        nds = "".join(f'<nd ref="{ref}"/>' for ref in refs)
+        tags = "".join(f'<tag k="{k}" v="{v}"/>' for k, v in
+                       {'highway': 'residential', **extra}.items())
+        body.append(f'<way id="{way_id}">{nds}{tags}</way>')
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">{nodes}'
+            + "".join(body) + "</osm>").encode()
+
+
+# Both ways come before their nodes, as in Overpass "recurse down" output;
+# way 11 repeats node 2 back to back
+_WAYS_FIRST_OSM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <way id="11">
+    <nd ref="2"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="residential"/>
+  </way>
+  <node id="1" lat="21.0300" lon="105.8500"/>
+  <node id="2" lat="21.0300" lon="105.8510"/>
+  <node id="3" lat="21.0300" lon="105.8520"/>
+</osm>
+"""
+
+
+def test_deferred_way_with_duplicate_refs_is_counted_not_fatal():
+    parser = OSMParser()
+    graph = parser.parse_osm_file(io.BytesIO(_WAYS_FIRST_OSM))
+    
+    assert parser.stats['parsing_errors'] == 1
+    assert parser.stats['included_ways'] == 1
+    assert graph.get_edge(1, 2) is not None
+    assert graph.get_edge(2, 3) is None
+
+
+def test_merging_file_with_reversed_way_keeps_one_edge():
+    graph = Graph()
+    OSMParser(graph=graph).parse_osm_file(io.BytesIO(_osm((10, [1, 2], {}))))
+    OSMParser(graph=graph).parse_osm_file(io.BytesIO(_osm((20, [2, 1], {}))))
+    
+    assert list(graph.edges) == [(1, 2)]
+    assert graph.get_statistics()['edge_count'] == 1
+    assert sum(len(edges) for edges in graph._edges_by_type.values()) == 1
+
+
+def test_reversed_ways_in_one_file_keep_one_edge():
+    graph = OSMParser().parse_osm_file(io.BytesIO(_osm((10, [1, 2, 3], {}), (11, [3, 2], {}))))
+    
+    assert sorted(graph.edges) == [(1, 2), (2, 3)]
+
+
+def test_opposite_one_way_ways_are_both_kept():
+    graph = OSMParser().parse_osm_file(io.BytesIO(_osm(
+        (10, [1, 2], {'oneway': 'yes'}), (11, [2, 1], {'oneway': 'yes'}))))
+    
+    assert sorted(graph.edges) == [(1, 2), (2, 1)]
+
+
+def _mixed_osm_file(path):
+    """
+    OSM file exercising the parallel parser
+    
+    Ways come both before and after the nodes, refer to nodes from all over
+    the file (so across any chunk boundary), and include excluded, one-way,
+    tagged and broken ways.
+    """
+    rng = random.Random(7)
+    node_ids = list(range(1, 301))
+    
+    def way(way_id, refs, **tags):
+        tags.setdefault('highway', 'residential')
+        nds = "".join(f'\n    <nd ref="{ref}"/>' for ref in refs)
+        tag_xml = "".join(f'\n    <tag k="{k}" v="{v}"/>' for k, v in tags.items())
+        return f'  <way id="{way_id}">{nds}{tag_xml}\n  </way>\n'
+    
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n']
+    for way_id in range(1000, 1020):
+        parts.append(way(way_id, rng.sample(node_ids, rng.randint(2, 6))))
+    for node_id in node_ids:
+        lat, lon = 21.0 + node_id * 1e-4, 105.8 + (node_id % 17) * 1e-4
+        if node_id % 10 == 0:
+            parts.append(f'  <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}">\n'
+                         f'    <tag k="highway" v="traffic_signals"/>\n  </node>\n')
+        else:
+            parts.append(f'  <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}"/>\n')
+    for way_id in range(2000, 2060):
+        parts.append(way(way_id, rng.sample(node_ids, rng.randint(2, 8)),
+                         maxspeed=rng.choice(['30', '50 mph', 'none']),
+                         oneway=rng.choice(['yes', 'no'])))
+    parts.append(way(3000, [1, 2], highway='construction'))
+    parts.append(way(3001, [3, 4], building='yes'))
+    parts.append(way(3002, [5, 5, 6]))
+    parts.append(way(3003, [7, 99999, 8]))
+    parts.append('</osm>\n')
+    path.write_text("".join(parts))
+    return str(path)
+
+
+def _graph_summary(parser, graph):
+    return (
+        parser.stats,
+        sorted((n.id, n.latitude, n.longitude, tuple(sorted(n.tags.items())))
+               for n in graph.nodes.values()),
+        sorted((key, e.weight, e.road_type, e.max_speed, e.bidirectional, e.name)
+               for key, e in graph.edges.items()),
+        sorted((n.id, tuple(sorted((nbr.id, w) for nbr, w in n.iter_neighbors())))
+               for n in graph.nodes.values()),
+    )
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_parse_matches_serial(tmp_path, caplog, workers):
+    path = _mixed_osm_file(tmp_path / "mixed.osm")
+    serial = OSMParser()
+    expected = _graph_summary(serial, serial.parse_osm_file(path))
+    
+    parallel = OSMParser(workers=workers)
+    with caplog.at_level(logging.INFO, logger='src.data.osm_parser'):
+        graph = parallel.parse_osm_file(path)
+    
+    assert f"Parsing with {workers} worker processes" in caplog.text
+    assert _graph_summary(parallel, graph) == expected
+    assert expected[0]['parsing_errors'] == 1
+
+
+def _forbid_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("file was parsed instead of loaded from cache")
+    monkeypatch.setattr(osm_parser, '_iter_osm_elements', fail)
+
+
+def test_parse_cache_hit_returns_equal_graph(tmp_path, monkeypatch):
+    path = _mixed_osm_file(tmp_path / "mixed.osm")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    first = OSMParser(cache_dir=str(cache_dir))
+    expected = _graph_summary(first, first.parse_osm_file(path))
+    
+    _forbid_parsing(monkeypatch)
+    cached = OSMParser(cache_dir=str(cache_dir))
+    
+    assert _graph_summary(cached, cached.parse_osm_file(path)) == expected
+
+
+def test_parse_cache_misses_after_touch_or_rewrite(tmp_path):
+    path = tmp_path / "roads.osm"
+    path.write_bytes(_osm((10, [1, 2], {})))
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    OSMParser(cache_dir=str(cache_dir)).parse_osm_file(str(path))
+    
+    def cache_files():
+        return {p.name for p in cache_dir.iterdir() if p.suffix == '.graph'}
+    
+    assert len(cache_files()) == 1
+    
+    # Same content, new mtime
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    OSMParser(cache_dir=str(cache_dir)).parse_osm_file(str(path))
+    assert len(cache_files()) == 2
+    
+    # Rewritten with another road; the old entry must not be served
+    path.write_bytes(_osm((10, [1, 2], {}), (11, [2, 3], {})))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    graph = OSMParser(cache_dir=str(cache_dir)).parse_osm_file(str(path))
+    assert sorted(graph.edges) == [(1, 2), (2, 3)]
+    assert len(cache_files()) == 3
+
+
+@pytest.mark.parametrize('maxspeed, expected', [
+    ('50', 50),
+    ('50 km/h', 50),
+    (' 30', 30),
+    ('50 mph', 80),
+    ('20MPH', 32),
+    ('50;70', 50),
+    ('RU:urban', None),
+    ('VN:urban', None),
+    ('none', None),
+    ('signals', None),
+    ('walk', None),
+    ('0', None),
+    ('', None),
+])
+def test_extract_speed(maxspeed, expected):
+    parser = OSMParser()
+    default = parser.DEFAULT_SPEEDS['residential']
+    
+    speed = parser._extract_speed({'maxspeed': maxspeed}, 'residential')
+    
+    assert speed == (default if expected is None else expected)
+
+
+def test_extract_speed_without_tag_uses_road_type_default():
+    parser = OSMParser()
+    assert parser._extract_speed({}, 'primary') == parser.DEFAULT_SPEEDS['primary']
+    assert parser._extract_speed({}, 'no_such_type') == 50
@@ -0,0 +1,61 @@
+"""Tests for PathfindingService caching"""
+
+import orjson
+import pytest
+
+from src.api import pathfinding_service
+from src.core.edge import Edge
+from src.core.graph import Graph
+from src.core.node import Node
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    graph = Graph()
+    for node_id, lon in ((1, 105.850), (2, 105.851), (3, 105.852)):
+        graph.add_node(Node(node_id, 21.03, lon))
+    graph.add_edge(Edge(1, 2, 104.0))
+    graph.add_edge(Edge(2, 3, 104.0))
+    graph_file = tmp_path / "graph.npz"
+    graph.save_to_file(str(graph_file))
+    
+    monkeypatch.setattr(pathfinding_service, 'get_graph_file', lambda name: graph_file)
+    monkeypatch.setattr(pathfinding_service, 'get_cache_db_file', lambda: tmp_path / "routes.db")
+    return pathfinding_service.PathfindingService()
+
+
+def _cached(payload: bytes) -> bool:
+    return orjson.loads(payload)['route']['cached']
+
+
+def test_clear_cache_drops_stored_and_in_memory_responses(service):
+    assert not _cached(service.find_route_json_by_node_ids(1, 3))
+    assert _cached(service.find_route_json_by_node_ids(1, 3))
+    
+    assert service.clear_cache()
+    
+    assert not service._response_cache
+    assert not _cached(service.find_route_json_by_node_ids(1, 3))
+
+
+def test_nearby_points_share_cached_response(service):
+    first = orjson.loads(service.find_route_json_by_coordinates(21.03, 105.8499, 21.03, 105.8521))
+    second = orjson.loads(service.find_route_json_by_coordinates(21.03, 105.8495, 21.03, 105.8524))
+    
+    assert not first['route']['cached']
+    assert second['route']['cached']
+    assert second['route']['path'] == first['route']['path'] == [1, 2, 3]
+    assert second['route']['start']['snap_distance'] != first['route']['start']['snap_distance']
+    assert len(service._response_cache) == 1
+
+
+def test_response_serialized_once_per_request(service, monkeypatch):
+    calls = []
+    dumps = pathfinding_service.orjson.dumps
+    monkeypatch.setattr(pathfinding_service.orjson, 'dumps',
+                        lambda obj, *args: calls.append(obj) or dumps(obj, *args))
+    
+    service.find_route_json_by_node_ids(1, 3)
+    assert len(calls) == 1
+    service.find_route_json_by_node_ids(1, 3)
+    assert len(calls) == 2
@@ -0,0 +1,33 @@
+"""Tests for request validation in the REST API"""
+
+import pytest
+
+from src.api import rest_endpoints
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Validation runs before the service is used, so any object will do
+    monkeypatch.setattr(rest_endpoints, 'get_service', lambda: object())
+    return rest_endpoints.create_app().test_client()
+
+
+@pytest.mark.parametrize('endpoint', ['/api/route/coordinates', '/api/route/nodes'])
+@pytest.mark.parametrize('body', ['null', 'not json', ''])
+def test_route_rejects_missing_or_invalid_body(client, endpoint, body):
+    response = client.post(endpoint, data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'start_id': 1},
+    {'start_id': [1], 'end_id': 2},
+    {'start_id': {'a': 1}, 'end_id': 2},
+    {'start_id': 1, 'end_id': 2, 'use_cache': 'yes'},
+])
+def test_route_nodes_rejects_bad_ids(client, body):
+    response = client.post('/api/route/nodes', json=body)
+    assert response.status_code == 400
+    assert response.json['success'] is False
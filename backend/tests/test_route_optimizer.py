@@ -0,0 +1,67 @@
+"""Tests for RouteOptimizer.precompute_routes"""
+
+import multiprocessing
+
+import pytest
+
+from src.cache import route_optimizer
+from src.cache.destination_cache import DestinationCache
+from src.cache.route_optimizer import RouteOptimizer
+from src.core.edge import Edge
+from src.core.graph import Graph
+from src.core.node import Node
+
+
+@pytest.fixture
+def optimizer(tmp_path):
+    graph = Graph()
+    for node_id, lon in ((1, 105.850), (2, 105.851), (3, 105.852)):
+        graph.add_node(Node(node_id, 21.03, lon))
+    graph.add_edge(Edge(1, 2, 104.0))
+    graph.add_edge(Edge(2, 3, 104.0))
+    cache = DestinationCache(str(tmp_path / "routes.db"))
+    yield RouteOptimizer(graph, cache)
+    cache.shutdown()
+
+
+def test_degenerate_pairs_are_skipped_not_counted(optimizer):
+    progress = []
+    cached = optimizer.precompute_routes([(1, 1), (1, 3), (2, 2)], max_workers=1,
+                                         progress_callback=lambda done, total: progress.append((done, total)))
+    
+    assert cached == 1
+    assert progress == [(1, 1)]
+    assert optimizer.stats['total_requests'] == 1
+    assert optimizer.cache.get_cache_statistics()['total_routes'] == 1
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                    reason="workers only fork where fork is available")
+def test_refresher_is_stopped_while_workers_fork(optimizer, monkeypatch):
+    cache = optimizer.cache
+    cache.get_cache_statistics()  # starts the refresher
+    assert cache._refresher.is_alive()
+    
+    refresher_alive = []
+    executor_class = route_optimizer.ProcessPoolExecutor
+    
+    def checking_executor(*args, **kwargs):
+        refresher_alive.append(cache._refresher.is_alive())
+        return executor_class(*args, **kwargs)
+    
+    monkeypatch.setattr(route_optimizer, 'ProcessPoolExecutor', checking_executor)
+    cached = optimizer.precompute_routes([(1, 3), (3, 1), (1, 2)], max_workers=2)
+    
+    assert refresher_alive == [False]
+    assert cached == 3
+    assert cache._refresher.is_alive()
+    assert cache.get_cached_route(3, 1)['path'] == [3, 2, 1]
+
+
+def test_reverse_cache_hit_runs_from_requested_start(optimizer):
+    forward = optimizer.find_route(1, 3)
+    reverse = optimizer.find_route(3, 1)
+    
+    assert not forward['cached'] and reverse['cached']
+    assert reverse['path'] == forward['path'][::-1] == [3, 2, 1]
+    assert reverse['distance'] == forward['distance']
@@ -0,0 +1,17 @@
+"""
+WSGI entry point for production servers
+
+Usage (from backend/):
+    gunicorn --preload -w 8 -k gthread --threads 2 -b 0.0.0.0:5000 wsgi:app
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from src.api.rest_endpoints import create_app
+
+app = create_app()